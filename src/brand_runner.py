@@ -0,0 +1,180 @@
+"""Run the bots for several brands from one deployment.
+
+Brands are described in ``BRANDS_FILE`` (see ``brands.example.json``)::
+
+    {"stylesync": {"topic_file": "brands/stylesync/topics.txt",
+                   "image_dir": "brands/stylesync/images",
+                   "env": {"TWITTER_API_KEY": "$STYLESYNC_TWITTER_API_KEY"},
+                   "jobs": ["post", "replies"]}}
+
+Each brand runs in its own process from a process pool. The worker starts
+from a fresh interpreter, so the module-level settings, memoized API
+clients and rate-limit buckets all belong to that brand. Its environment is
+the runner's environment without any credentials, plus the brand's ``env``
+(values starting with ``$`` are read from the runner's environment). The
+worker runs inside ``BRAND_STATE_DIR/<brand>``, so ``since_id.txt``, the
+follow ledger, the tweet style state, the content queue and the log file
+are kept per brand.
+
+Usage:
+    python src/brand_runner.py [job ...]   # jobs default to the brand's "jobs"
+
+Jobs: ``post`` (all platforms), ``post:<platform>``, ``replies``,
+``engagement`` and ``backlog``. ``BRAND_NAMES`` limits the run to a comma
+separated list of brands.
+"""
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+BRANDS_FILE = os.getenv("BRANDS_FILE", "brands.json")
+BRAND_STATE_DIR = os.getenv("BRAND_STATE_DIR", "state")
+BRAND_WORKERS = int(os.getenv("BRAND_WORKERS", str(os.cpu_count() or 1)))
+BRAND_NAMES = [b for b in os.getenv("BRAND_NAMES", "").split(",") if b]
+
+# Never inherited from the runner; a brand only gets the ones it configures.
+CREDENTIAL_KEYS = (
+    "OPENAI_API_KEY",
+    "TWITTER_API_KEY",
+    "TWITTER_API_SECRET",
+    "TWITTER_ACCESS_TOKEN",
+    "TWITTER_ACCESS_SECRET",
+    "TWITTER_BEARER_TOKEN",
+    "TWITTER_CONSUMER_KEY",
+    "TWITTER_CONSUMER_SECRET",
+    "META_ACCESS_TOKEN",
+    "FB_PAGE_ID",
+    "IG_USER_ID",
+    "IG_BUSINESS_ID",
+    "TIKTOK_ACCESS_TOKEN",
+    "EMAIL_USER",
+    "EMAIL_PASSWORD",
+)
+JOBS = ("post", "replies", "engagement", "backlog")
+
+
+def load_brands(path: str = BRANDS_FILE) -> dict[str, dict]:
+    with open(path) as f:
+        brands = json.load(f)
+    if BRAND_NAMES:
+        brands = {name: cfg for name, cfg in brands.items() if name in BRAND_NAMES}
+    return brands
+
+
+def brand_env(name: str, config: dict) -> dict[str, str]:
+    """Return the environment for one brand's worker."""
+    env = {k: v for k, v in os.environ.items() if k not in CREDENTIAL_KEYS}
+    for key, value in config.get("env", {}).items():
+        if isinstance(value, str) and value.startswith("$"):
+            value = os.getenv(value[1:])
+            if value is None:
+                print(f"⚠️ {name}: {key} is not set")
+                continue
+        env[key] = str(value)
+    # Shared inputs resolve against the repo; state files stay relative to
+    # the brand's working directory.
+    env["TOPIC_FILE"] = os.path.join(ROOT, config.get("topic_file", "topics.txt"))
+    env["IMAGE_DIR"] = os.path.join(ROOT, config.get("image_dir", "images"))
+    env["LOG_FILE"] = config.get("log_file", "log.txt")
+    return env
+
+
+def _run_job(job: str):
+    if job == "post":
+        from src.post_scheduler import post_to_all_platforms
+
+        return post_to_all_platforms()
+    if job.startswith("post:"):
+        from src.post_scheduler import post_content
+
+        return post_content(job.split(":", 1)[1])
+    if job == "replies":
+        from src.twitter_bot.reply_mentions import reply_to_mentions
+
+        return reply_to_mentions()
+    if job == "engagement":
+        from src import engagement_bot
+
+        engagement_bot.follow_engagers()
+        engagement_bot.like_recent_posts()
+        return engagement_bot.unfollow_nonfollowers()
+    if job == "backlog":
+        from src.content_queue import generate_backlog
+
+        return generate_backlog()
+    raise ValueError(f"Unknown job {job}")
+
+
+def run_brand(name: str, env: dict[str, str], jobs: list[str]) -> dict[str, object]:
+    """Worker entry point: run jobs for one brand in its own state directory."""
+    state_dir = os.path.join(ROOT, BRAND_STATE_DIR, name)
+    os.makedirs(state_dir, exist_ok=True)
+    os.environ.clear()
+    os.environ.update(env)
+    os.chdir(state_dir)
+    results = {}
+    for job in jobs:
+        print(f"▶️ {name}: {job}")
+        try:
+            result = _run_job(job)
+            results[job] = result if isinstance(result, (str, dict)) else "ok"
+        except Exception as exc:
+            print(f"❌ {name}: {job} failed: {exc}")
+            results[job] = f"failed: {exc}"
+    return results
+
+
+def _valid_job(job: str) -> bool:
+    return job in JOBS or job.startswith("post:")
+
+
+def run_brands(
+    brands: dict[str, dict],
+    jobs: list[str] | None = None,
+    workers: int = BRAND_WORKERS,
+) -> dict[str, dict[str, object]]:
+    """Shard brands across a process pool. Returns results per brand and job."""
+    plan = {name: jobs or cfg.get("jobs", ["post"]) for name, cfg in brands.items()}
+    for name, brand_jobs in plan.items():
+        unknown = [job for job in brand_jobs if not _valid_job(job)]
+        if unknown:
+            raise ValueError(f"{name}: unknown jobs {', '.join(unknown)}")
+    results = {}
+    if not plan:
+        return results
+    # A fresh interpreter per brand keeps module-level state from leaking.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(plan))), mp_context=ctx, max_tasks_per_child=1
+    ) as pool:
+        futures = {
+            pool.submit(run_brand, name, brand_env(name, brands[name]), brand_jobs): name
+            for name, brand_jobs in plan.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as exc:
+                results[name] = {"worker": f"failed: {exc}"}
+            print(f"✅ {name}: {results[name]}")
+    return results
+
+
+def main():
+    brands = load_brands()
+    print(f"🏷️ Running {len(brands)} brands on up to {BRAND_WORKERS} processes")
+    run_brands(brands, sys.argv[1:] or None)
+
+
+if __name__ == "__main__":
+    # Run through the package module so workers unpickle src.brand_runner
+    # functions rather than __main__ ones.
+    from src import brand_runner
+
+    brand_runner.main()
@@ -0,0 +1,235 @@
+"""Pre-generated content backlog shared by the posting bots.
+
+``generate_backlog`` writes a batch of posts for every platform with a few
+large chat completions (one structured JSON response per ``BATCH_SIZE``
+posts) and stores them in a SQLite queue. The publishers call
+``claim_post(platform)`` first and only generate a post on the spot when the
+queue for that platform is empty, so publish time is just the upload.
+
+A claimed post stays in the queue until the publisher calls
+``complete_post`` after a successful post; ``release_post`` hands it back on
+failure. Publishers wrap this in ``ClaimedPost``, which completes or
+releases the claim when the publish block exits. Claims older than
+``CLAIM_TIMEOUT`` seconds (a crashed run) are handed out again.
+
+Run this module directly to fill the queue, e.g. once a week::
+
+    BACKLOG_DAYS=7 POSTS_PER_DAY=3 python src/content_queue.py
+"""
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.topic_store import TOPIC_HISTORY_SIZE, get_topic_store
+
+CONTENT_QUEUE_PATH = os.getenv("CONTENT_QUEUE_PATH", "content_queue.sqlite3")
+TOPIC_FILE = os.getenv("TOPIC_FILE", "topics.txt")
+BACKLOG_DAYS = int(os.getenv("BACKLOG_DAYS", "7"))
+POSTS_PER_DAY = int(os.getenv("POSTS_PER_DAY", "3"))
+BATCH_SIZE = int(os.getenv("BACKLOG_BATCH_SIZE", "20"))
+CLAIM_TIMEOUT = int(os.getenv("CONTENT_CLAIM_TIMEOUT", "3600"))
+
+PLATFORMS = ["twitter", "instagram", "facebook"]
+STYLES = ["funny", "serious", "update"]
+PLATFORM_RULES = {
+    "twitter": "Keep each post under 280 characters and add a couple relevant hashtags.",
+    "instagram": "Write an engaging caption and end with a few relevant hashtags.",
+    "facebook": "Write a short update and add a couple relevant hashtags at the end.",
+}
+
+_lock = threading.Lock()
+
+
+def _connect(path: str = CONTENT_QUEUE_PATH) -> sqlite3.Connection:
+    db = sqlite3.connect(path, timeout=30)
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS posts ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, platform TEXT NOT NULL, style TEXT NOT NULL, "
+        "topic TEXT NOT NULL, text TEXT NOT NULL, created REAL NOT NULL, claimed_at REAL)"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS posts_platform ON posts (platform, id)")
+    return db
+
+
+def push_posts(posts: list[dict], path: str = CONTENT_QUEUE_PATH):
+    """Append posts (dicts with platform, style, topic, text) to the queue."""
+    now = time.time()
+    with _lock:
+        db = _connect(path)
+        try:
+            with db:
+                db.executemany(
+                    "INSERT INTO posts (platform, style, topic, text, created) VALUES (?, ?, ?, ?, ?)",
+                    [(p["platform"], p["style"], p["topic"], p["text"], now) for p in posts],
+                )
+        finally:
+            db.close()
+
+
+def claim_post(platform: str, path: str = CONTENT_QUEUE_PATH) -> dict | None:
+    """Claim and return the oldest unclaimed post for platform, or None.
+
+    The post is only removed by ``complete_post``; pass its ``id`` back to
+    ``complete_post`` or ``release_post``.
+    """
+    if not os.path.exists(path):
+        return None
+    now = time.time()
+    with _lock:
+        db = _connect(path)
+        try:
+            db.isolation_level = None
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT id, style, topic, text FROM posts "
+                "WHERE platform = ? AND (claimed_at IS NULL OR claimed_at < ?) ORDER BY id LIMIT 1",
+                (platform, now - CLAIM_TIMEOUT),
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE posts SET claimed_at = ? WHERE id = ?", (now, row[0]))
+            db.execute("COMMIT")
+        except sqlite3.Error as exc:
+            print("Content queue unavailable:", exc)
+            return None
+        finally:
+            db.close()
+    if row is None:
+        return None
+    return {"id": row[0], "platform": platform, "style": row[1], "topic": row[2], "text": row[3]}
+
+
+def _finish_claim(post_id: int, sql: str, path: str):
+    with _lock:
+        db = _connect(path)
+        try:
+            with db:
+                db.execute(sql, (post_id,))
+        except sqlite3.Error as exc:
+            print("Content queue unavailable:", exc)
+        finally:
+            db.close()
+
+
+def complete_post(post_id: int, path: str = CONTENT_QUEUE_PATH):
+    """Delete a claimed post once it has been published."""
+    _finish_claim(post_id, "DELETE FROM posts WHERE id = ?", path)
+
+
+def release_post(post_id: int, path: str = CONTENT_QUEUE_PATH):
+    """Return a claimed post to the queue after a failed publish."""
+    _finish_claim(post_id, "UPDATE posts SET claimed_at = NULL WHERE id = ?", path)
+
+
+class ClaimedPost:
+    """Claim a queued post for the length of a ``with`` block.
+
+    ``post`` is the claimed post, or None when the queue for platform is
+    empty. Set ``published`` once the publish call has succeeded: on exit the
+    post is deleted if it was published and handed back otherwise, including
+    when the block raises.
+    """
+
+    def __init__(self, platform: str, path: str = CONTENT_QUEUE_PATH):
+        self.platform = platform
+        self.path = path
+        self.post: dict | None = None
+        self.published = False
+
+    def __enter__(self) -> "ClaimedPost":
+        self.post = claim_post(self.platform, self.path)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.post is None:
+            return
+        if self.published:
+            complete_post(self.post["id"], self.path)
+        else:
+            release_post(self.post["id"], self.path)
+
+
+def queue_depth(path: str = CONTENT_QUEUE_PATH) -> dict[str, int]:
+    """Return the number of queued posts per platform."""
+    if not os.path.exists(path):
+        return {}
+    db = _connect(path)
+    try:
+        return dict(db.execute("SELECT platform, COUNT(*) FROM posts GROUP BY platform"))
+    finally:
+        db.close()
+
+
+def _batch_prompt(platform: str, slots: list[tuple[str, str]]) -> str:
+    lines = "\n".join(f"{i + 1}. style: {style}; topic: {topic}" for i, (style, topic) in enumerate(slots))
+    return (
+        f"Write {len(slots)} distinct {platform} posts, one for each line below. "
+        f"{PLATFORM_RULES.get(platform, '')}\n{lines}\n"
+        'Respond with JSON of the form {"posts": [{"style": "...", "topic": "...", "text": "..."}]} '
+        "in the same order."
+    )
+
+
+def generate_batch(client, platform: str, slots: list[tuple[str, str]], model: str = "gpt-4o") -> list[dict]:
+    """Generate one post per (style, topic) slot with a single chat completion."""
+    res = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": _batch_prompt(platform, slots)}],
+        response_format={"type": "json_object"},
+    )
+    data = json.loads(res.choices[0].message.content)
+    posts = []
+    for (style, topic), item in zip(slots, data.get("posts", [])):
+        text = str(item.get("text", "")).strip()
+        if not text:
+            continue
+        if platform == "twitter" and len(text) > 280:
+            continue
+        posts.append({"platform": platform, "style": style, "topic": topic, "text": text})
+    return posts
+
+
+def generate_backlog(
+    days: int = BACKLOG_DAYS,
+    posts_per_day: int = POSTS_PER_DAY,
+    platforms: list[str] | None = None,
+    client=None,
+) -> dict[str, int]:
+    """Fill the queue with days * posts_per_day posts per platform."""
+    if client is None:
+        from src.utils import get_openai_client
+
+        client = get_openai_client()
+    added = {}
+    topics = get_topic_store(TOPIC_FILE)
+    for platform in platforms or PLATFORMS:
+        # Topics are recorded in the no-repeat history when a post is
+        # published, not here; only avoid repeats within the batch.
+        recent = deque(maxlen=TOPIC_HISTORY_SIZE)
+        slots = []
+        for _ in range(days * posts_per_day):
+            topic = topics.sample("our AI app", record=False, avoid=recent)
+            recent.append(topic)
+            slots.append((random.choice(STYLES), topic))
+        count = 0
+        for start in range(0, len(slots), BATCH_SIZE):
+            try:
+                posts = generate_batch(client, platform, slots[start:start + BATCH_SIZE])
+            except Exception as exc:
+                print(f"Backlog batch for {platform} failed:", exc)
+                continue
+            push_posts(posts)
+            count += len(posts)
+        added[platform] = count
+        print(f"Queued {count} {platform} posts")
+    return added
+
+
+if __name__ == "__main__":
+    generate_backlog()
+    print("Queue depth:", queue_depth())
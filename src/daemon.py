@@ -0,0 +1,188 @@
+"""Long-running scheduler that keeps clients and caches warm between posts.
+
+Instead of one cold GitHub Actions job per post, this process imports the
+posting code once and uses APScheduler to run ``post_content`` for each
+platform at the slots picked by ``src/slot_planner.py`` (daily caps, minimum
+gap and quiet hours come from the ``SLOT_*`` settings). Jobs are
+stored in SQLite (``DAEMON_JOBSTORE``), so a restart picks up the posts that
+were already planned; a post missed while the daemon was down still runs if
+it is less than ``DAEMON_MISFIRE_GRACE`` seconds late.
+
+Published posts are logged in ``DAEMON_POST_LOG``. Re-planning (at startup
+and after midnight) counts them against the platform's daily cap and keeps
+the minimum gap to them, so a restart never adds a second day's worth of
+posts.
+
+Usage:
+    python src/daemon.py
+"""
+from __future__ import annotations
+
+import os
+import signal
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src import post_scheduler
+
+DAEMON_JOBSTORE = os.getenv("DAEMON_JOBSTORE", "sqlite:///scheduler.sqlite3")
+DAEMON_PLATFORMS = [p for p in os.getenv("DAEMON_PLATFORMS", "twitter,instagram").split(",") if p]
+# Optional overrides of the slot planner's per-platform cap and posting window.
+DAEMON_POSTS_PER_DAY = os.getenv("DAEMON_POSTS_PER_DAY")
+DAEMON_START_HOUR = os.getenv("DAEMON_START_HOUR")
+DAEMON_END_HOUR = os.getenv("DAEMON_END_HOUR")
+# Days planned ahead each time plan_posts runs (day 0 is today).
+DAEMON_PLAN_DAYS = int(os.getenv("DAEMON_PLAN_DAYS", "2"))
+DAEMON_MISFIRE_GRACE = int(os.getenv("DAEMON_MISFIRE_GRACE", "3600"))
+DAEMON_POST_LOG = os.getenv("DAEMON_POST_LOG", "daemon_posts.sqlite3")
+# Run the mention reply bot every N hours (0 disables it).
+DAEMON_REPLY_HOURS = float(os.getenv("DAEMON_REPLY_HOURS", "0"))
+
+_scheduler: BlockingScheduler | None = None
+
+
+def _post_log() -> sqlite3.Connection:
+    db = sqlite3.connect(DAEMON_POST_LOG, timeout=30)
+    db.execute("CREATE TABLE IF NOT EXISTS posts (platform TEXT NOT NULL, posted_at REAL NOT NULL)")
+    db.execute("CREATE INDEX IF NOT EXISTS posts_posted_at ON posts (posted_at)")
+    return db
+
+
+def record_post(platform: str):
+    """Log a published post; rows older than two days are dropped."""
+    now = time.time()
+    db = _post_log()
+    try:
+        with db:
+            db.execute("INSERT INTO posts (platform, posted_at) VALUES (?, ?)", (platform, now))
+            db.execute("DELETE FROM posts WHERE posted_at < ?", (now - 2 * 86400,))
+    finally:
+        db.close()
+
+
+def posted_since(since: datetime) -> dict[str, list[datetime]]:
+    """Local times of the posts published since the given time, per platform."""
+    db = _post_log()
+    try:
+        rows = db.execute("SELECT platform, posted_at FROM posts WHERE posted_at >= ?", (since.timestamp(),))
+        posted = {}
+        for platform, posted_at in rows:
+            posted.setdefault(platform, []).append(datetime.fromtimestamp(posted_at).astimezone())
+        return posted
+    finally:
+        db.close()
+
+
+def run_post(platform: str):
+    """Job entry point; kept module-level so the job store can reference it."""
+    if post_scheduler.post_content(platform) == "posted":
+        record_post(platform)
+
+
+def run_replies():
+    from src.twitter_bot.reply_mentions import reply_to_mentions
+
+    reply_to_mentions()
+
+
+def daemon_accounts() -> list[dict]:
+    """Slot planner accounts for DAEMON_PLATFORMS."""
+    accounts = []
+    for platform in DAEMON_PLATFORMS:
+        account = {"name": platform, "platform": platform}
+        if DAEMON_POSTS_PER_DAY:
+            account["daily_cap"] = int(DAEMON_POSTS_PER_DAY)
+        if DAEMON_START_HOUR:
+            account["start_hour"] = float(DAEMON_START_HOUR)
+        if DAEMON_END_HOUR:
+            account["end_hour"] = float(DAEMON_END_HOUR)
+        accounts.append(account)
+    return accounts
+
+
+def plan_posts():
+    """Schedule posts for every platform and day in the horizon that has none pending.
+
+    Posts already published today count towards the daily cap, and new
+    slots keep the minimum gap to them.
+    """
+    from src.slot_planner import daily_cap, min_gap, plan_slots, slot_datetime
+
+    pending = {
+        (job.args[0], job.next_run_time.astimezone().date())
+        for job in _scheduler.get_jobs()
+        if job.id.startswith("post-") and job.next_run_time
+    }
+    midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+    posted = posted_since(midnight)
+    accounts = daemon_accounts()
+    planned = {}
+    used = {}
+    for slot in plan_slots(accounts, days=DAEMON_PLAN_DAYS):
+        account = accounts[slot["account"]]
+        platform = account["platform"]
+        when = slot_datetime(slot["when"]).astimezone()
+        key = (platform, when.date())
+        if key in pending:
+            continue
+        done = [t for t in posted.get(platform, []) if t.date() == when.date()]
+        if used.get(key, 0) + len(done) >= daily_cap(account):
+            continue
+        if any(abs(when - t) < timedelta(minutes=min_gap(account)) for t in done):
+            continue
+        used[key] = used.get(key, 0) + 1
+        _scheduler.add_job(
+            run_post,
+            "date",
+            run_date=when,
+            args=[platform],
+            id=f"post-{platform}-{when:%Y%m%d%H%M%S}",
+            replace_existing=True,
+        )
+        planned.setdefault(platform, []).append(when)
+    for platform, times in planned.items():
+        post_scheduler.log(f"Planned {platform} posts at " + ", ".join(t.strftime("%Y-%m-%d %H:%M") for t in times))
+
+
+def build_scheduler(jobstore_url: str = DAEMON_JOBSTORE) -> BlockingScheduler:
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    global _scheduler
+    _scheduler = BlockingScheduler(
+        jobstores={"default": SQLAlchemyJobStore(url=jobstore_url)},
+        job_defaults={"coalesce": True, "misfire_grace_time": DAEMON_MISFIRE_GRACE, "max_instances": 1},
+    )
+    # Re-plan shortly after midnight and once right after startup.
+    _scheduler.add_job(plan_posts, "cron", hour=0, minute=5, id="plan-posts", replace_existing=True)
+    _scheduler.add_job(plan_posts, "date", run_date=datetime.now(), id="plan-posts-startup", replace_existing=True)
+    if DAEMON_REPLY_HOURS > 0:
+        _scheduler.add_job(
+            run_replies, "interval", hours=DAEMON_REPLY_HOURS, id="reply-mentions", replace_existing=True
+        )
+    return _scheduler
+
+
+def main():
+    scheduler = build_scheduler()
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.shutdown(wait=False))
+    print(f"Scheduler daemon started for {', '.join(DAEMON_PLATFORMS)}")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+
+if __name__ == "__main__":
+    # Run through the package module so stored jobs reference src.daemon
+    # functions rather than __main__ ones.
+    from src import daemon
+
+    daemon.main()
@@ -5,83 +5,152 @@
 - Unfollow accounts that don't follow back after a configurable
   number of days.
 
-This script stores follow timestamps in ``followed.json``.
-Use responsibly and stay within the platform's rate limits.
+Follow timestamps are kept in a SQLite ledger (``followed.sqlite3``, see
+``src/follow_ledger.py``); an existing ``followed.json`` is imported on the
+first run. Use responsibly and stay within the platform's rate limits.
 """
 
-import json
 import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import lru_cache
 
-import tweepy
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.follow_ledger import FollowLedger
+from src.follower_set import FollowerSet
+from src.rate_limit import quota, rate_limited
 
-FOLLOW_FILE = "followed.json"
 UNFOLLOW_AFTER_DAYS = int(os.getenv("UNFOLLOW_AFTER_DAYS", "7"))
+LIKE_FOLLOWER_LIMIT = int(os.getenv("LIKE_FOLLOWER_LIMIT", "20"))
+LIKE_WORKERS = int(os.getenv("LIKE_WORKERS", "4"))
 
-auth = tweepy.OAuth1UserHandler(
-    os.getenv("TWITTER_API_KEY"),
-    os.getenv("TWITTER_API_SECRET"),
-    os.getenv("TWITTER_ACCESS_TOKEN"),
-    os.getenv("TWITTER_ACCESS_SECRET"),
-)
-api = tweepy.API(auth)
 
+@lru_cache(maxsize=None)
+def get_api():
+    """Return the rate-limited tweepy API client, created on first use."""
+    import tweepy
 
-def load_followed():
-    if os.path.exists(FOLLOW_FILE):
-        with open(FOLLOW_FILE) as f:
-            return json.load(f)
-    return {}
-
-
-def save_followed(data):
-    with open(FOLLOW_FILE, "w") as f:
-        json.dump(data, f)
+    auth = tweepy.OAuth1UserHandler(
+        os.getenv("TWITTER_API_KEY"),
+        os.getenv("TWITTER_API_SECRET"),
+        os.getenv("TWITTER_ACCESS_TOKEN"),
+        os.getenv("TWITTER_ACCESS_SECRET"),
+    )
+    return rate_limited(tweepy.API(auth))
 
 
 def follow_engagers():
     """Follow users who recently engaged with mentions."""
-    followed = load_followed()
+    import tweepy
+
+    api = get_api()
+    ledger = FollowLedger()
     mentions = api.mentions_timeline(count=20)
+    known = ledger.known(m.user.id for m in mentions)
     for m in mentions:
         uid = str(m.user.id)
-        if uid not in followed:
-            api.create_friendship(uid)
-            followed[uid] = datetime.utcnow().isoformat()
+        if uid not in known:
+            try:
+                api.create_friendship(user_id=uid)
+            except tweepy.TweepyException as exc:
+                print("Failed to follow", m.user.screen_name, exc)
+                continue
+            ledger.record(uid)
+            known.add(uid)
             print("Followed", m.user.screen_name)
-    save_followed(followed)
+    ledger.close()
+
+
+def _like(tweet_id) -> bool:
+    """Like a tweet; True if it is liked afterwards (139 = already liked)."""
+    import tweepy
+
+    try:
+        get_api().create_favorite(tweet_id)
+        return True
+    except tweepy.HTTPException as exc:
+        return 139 in exc.api_codes
+    except tweepy.TweepyException:
+        return False
+
+
+def like_recent_posts(limit: int = LIKE_FOLLOWER_LIMIT):
+    """Like the most recent tweet from each follower.
+
+    Follower pages (up to 200 users per request) already embed each user's
+    latest tweet, so no per-user timeline call is needed. Tweets that are
+    already liked, either according to the API or the local ledger, are
+    skipped and the remaining likes run on a small thread pool.
+    """
+    import tweepy
+
+    ledger = FollowLedger()
+    latest = {}
+    for follower in tweepy.Cursor(get_api().get_followers, count=200, skip_status=False).items(limit):
+        status = getattr(follower, "status", None)
+        if status is not None and not getattr(status, "favorited", False):
+            latest[status.id] = follower.screen_name
+    for tweet_id in ledger.liked(latest):
+        latest.pop(tweet_id, None)
+
+    liked = []
+    with ThreadPoolExecutor(max_workers=max(LIKE_WORKERS, 1)) as pool:
+        futures = {pool.submit(_like, tweet_id): tweet_id for tweet_id in latest}
+        for future in as_completed(futures):
+            tweet_id = futures[future]
+            if future.result():
+                liked.append(tweet_id)
+                print("Liked tweet from", latest[tweet_id])
+    ledger.record_likes(liked)
+    ledger.close()
 
 
-def like_recent_posts():
-    """Like the most recent tweet from each follower."""
-    for follower in tweepy.Cursor(api.followers).items(20):
-        tweets = api.user_timeline(user_id=follower.id, count=1)
-        for t in tweets:
-            try:
-                api.create_favorite(t.id)
-                print("Liked tweet from", follower.screen_name)
-            except tweepy.TweepError:
-                pass
+def unfollow_nonfollowers():
+    """Unfollow accounts that haven't followed back after N days.
 
+    Follow-backs are marked mutual and skipped; the follower list is still
+    fetched while any are marked, so one that unfollows again is unmarked
+    and checked like any other follow.
+    """
+    import tweepy
 
-def unfollow_nonfollowers():
-    """Unfollow accounts that haven't followed back after N days."""
-    followed = load_followed()
-    followers_ids = set(str(fid) for fid in api.followers_ids())
+    ledger = FollowLedger()
     cutoff = datetime.utcnow() - timedelta(days=UNFOLLOW_AFTER_DAYS)
-    updated = False
-    for uid, ts in list(followed.items()):
-        if uid not in followers_ids and datetime.fromisoformat(ts) < cutoff:
-            api.destroy_friendship(uid)
-            print("Unfollowed", uid)
-            del followed[uid]
-            updated = True
-    if updated:
-        save_followed(followed)
+    expired = list(ledger.expired(cutoff))
+    if expired or ledger.has_mutual():
+        api = get_api()
+        followers = FollowerSet.fetch(api)
+        previous = FollowerSet.load()
+        if previous is not None:
+            gained, lost = followers.diff(previous)
+            print(f"Followers: {len(followers)} (+{len(gained)} / -{len(lost)} since last run)")
+            ledger.clear_mutual(lost)
+        else:
+            # Nothing to diff against: re-check every follow-back.
+            ledger.clear_mutual()
+        followers.save()
+        expired = list(ledger.expired(cutoff))
+        mutual = []
+        for uid in expired:
+            if uid in followers:
+                mutual.append(uid)
+            else:
+                try:
+                    api.destroy_friendship(user_id=uid)
+                except tweepy.TweepyException as exc:
+                    print("Failed to unfollow", uid, exc)
+                    continue
+                print("Unfollowed", uid)
+                ledger.remove(uid)
+        # Follow-backs are skipped until they show up in a later lost diff.
+        ledger.mark_mutual(mutual)
+    ledger.close()
 
 
 if __name__ == "__main__":
     follow_engagers()
     like_recent_posts()
     unfollow_nonfollowers()
+    print("Rate limits:", quota())
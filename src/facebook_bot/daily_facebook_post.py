@@ -1,26 +1,22 @@
 import os
 import random
+import sys
 from datetime import datetime
-from pathlib import Path
+from typing import BinaryIO
 
-import requests
-from openai import OpenAI
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from src.content_queue import ClaimedPost
+from src.graph_api import get_graph_client
+from src.llm_cache import cached_completion
+from src.media import download_media
+from src.topic_store import random_topic, record_topic
+from src.utils import get_openai_client
 
 TOPIC_FILE = os.getenv("TOPIC_FILE", "topics.txt")
 IMAGE_DIR = os.getenv("IMAGE_DIR", "images")
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
-def _load_topics() -> list[str]:
-    if not os.path.exists(TOPIC_FILE):
-        return ["our product"]
-    with open(TOPIC_FILE, "r") as f:
-        return [line.strip() for line in f if line.strip()]
-
-
 def _get_random_topic() -> str:
-    return random.choice(_load_topics())
+    return random_topic(TOPIC_FILE, "our product", record=False)
 
 
 def _random_style() -> str:
@@ -34,11 +30,15 @@ def generate_post(topic: str, style: str) -> str:
     )
     for i in range(3):
         try:
-            res = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
+            post = cached_completion(
+                "post",
+                "gpt-4o",
+                prompt,
+                lambda: get_openai_client().chat.completions.create(
+                    model="gpt-4o",
+                    messages=[{"role": "user", "content": prompt}],
+                ).choices[0].message.content.strip(),
             )
-            post = res.choices[0].message.content.strip()
             print(f"✅ Generated post (attempt {i+1}): {post}")
             return post
         except Exception as e:
@@ -49,7 +49,7 @@ def generate_post(topic: str, style: str) -> str:
 def generate_image_from_post(post: str) -> str | None:
     try:
         print("🖼️ Requesting image generation based on post text...")
-        res = client.images.generate(
+        res = get_openai_client().images.generate(
             model="dall-e-3",
             prompt=(
                 f"Create an engaging image to visually represent this Facebook post: \"{post}\". "
@@ -67,57 +67,64 @@ def generate_image_from_post(post: str) -> str | None:
         return None
 
 
-def download_image(url: str) -> str | None:
+def download_image(url: str) -> BinaryIO | None:
+    """Stream the image into a memory-backed buffer (spills to a temp file if large)."""
     try:
-        r = requests.get(url)
-        path = os.path.join(IMAGE_DIR, "fb_temp.jpg")
-        os.makedirs(IMAGE_DIR, exist_ok=True)
-        with open(path, "wb") as f:
-            f.write(r.content)
-        print(f"✅ Image saved to {path}")
-        return path
+        image = download_media(url)
+        print("✅ Image downloaded")
+        return image
     except Exception as e:
         print(f"❌ Failed to download image: {e}")
         return None
 
 
-def post_to_facebook(text: str, image_path: str | None = None):
+def post_to_facebook(text: str, image: BinaryIO | None = None) -> bool:
+    """Publish the post; returns True once Facebook accepted it."""
     token = os.getenv("META_ACCESS_TOKEN")
     page_id = os.getenv("FB_PAGE_ID")
     if not token or not page_id:
         print("❌ Facebook credentials not configured.")
-        return
-
-    if image_path and os.path.exists(image_path):
-        url = f"https://graph.facebook.com/v23.0/{page_id}/photos"
-        print(f"📤 Posting image to Facebook: {image_path}")
-        with open(image_path, "rb") as img:
-            res = requests.post(
-                url,
-                data={"caption": text, "access_token": token},
-                files={"source": img},
-            )
+        return False
+
+    graph = get_graph_client()
+    if image is not None:
+        print("📤 Posting image to Facebook...")
+        res = graph.post(
+            f"{page_id}/photos",
+            data={"caption": text},
+            files={"source": ("image.png", image)},
+        )
     else:
-        url = f"https://graph.facebook.com/v23.0/{page_id}/feed"
         print("📝 Posting text-only update to Facebook...")
-        res = requests.post(url, data={"message": text, "access_token": token})
+        res = graph.post(f"{page_id}/feed", data={"message": text})
 
     if res.status_code == 200:
         print("✅ Post sent to Facebook")
-    else:
-        print(f"❌ Facebook post failed: {res.status_code} - {res.text}")
+        return True
+    print(f"❌ Facebook post failed: {res.status_code} - {res.text}")
+    return False
 
 
 
 def main():
-    style = _random_style()
-    topic = _get_random_topic()
-    post = generate_post(topic, style)
-    image_url = generate_image_from_post(post)
-    image_path = download_image(image_url) if image_url else None
-    post_to_facebook(post, image_path)
-    if image_path and os.path.exists(image_path):
-        Path(image_path).unlink(missing_ok=True)
+    with ClaimedPost("facebook") as claim:
+        if claim.post:
+            style, topic, post = claim.post["style"], claim.post["topic"], claim.post["text"]
+            print(f"📦 Using queued facebook post: {post}")
+        else:
+            style = _random_style()
+            topic = _get_random_topic()
+            post = generate_post(topic, style)
+        image_url = generate_image_from_post(post)
+        image = download_image(image_url) if image_url else None
+        try:
+            claim.published = post_to_facebook(post, image)
+        finally:
+            if image is not None:
+                image.close()
+    if not claim.published:
+        return
+    record_topic(TOPIC_FILE, topic)
     print(f"[{datetime.now().isoformat()}] Posted to Facebook with style {style} about '{topic}'")
 
 
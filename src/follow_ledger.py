@@ -0,0 +1,150 @@
+"""SQLite ledger of accounts followed (and tweets liked) by the engagement bot.
+
+Each follow is one row keyed by user id with the follow time (UTC epoch
+seconds) indexed, so finding follows older than the unfollow cutoff is a
+range scan and recording a follow is a single insert. Every change is its
+own transaction, so a crash can never leave a half-written ledger.
+
+The first time a ledger is opened next to an existing ``followed.json`` the
+JSON entries are imported and the file is renamed to
+``followed.json.migrated``.
+
+Follows that were found to be mutual at the unfollow check are marked, so
+they stay known (and are not followed again) and ``expired`` skips them. The
+mark is cleared when the account later stops following back, which makes the
+follow eligible for unfollowing again.
+
+Liked tweet IDs live in a second table so the like pass can skip tweets it
+has already liked without asking the API.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+FOLLOW_DB = os.getenv("FOLLOW_DB", "followed.sqlite3")
+FOLLOW_FILE = os.getenv("FOLLOW_FILE", "followed.json")
+
+# SQLite limits bound parameters per statement; stay well below it.
+_CHUNK = 500
+
+
+def _epoch(when: datetime) -> float:
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+class FollowLedger:
+    def __init__(self, path: str = FOLLOW_DB, legacy_json: str | None = FOLLOW_FILE):
+        self.db = sqlite3.connect(path, timeout=30)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS follows ("
+                "user_id TEXT PRIMARY KEY, followed_at REAL NOT NULL, mutual INTEGER NOT NULL DEFAULT 0)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS follows_followed_at ON follows (followed_at)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS likes (tweet_id INTEGER PRIMARY KEY, liked_at REAL NOT NULL)"
+            )
+        if legacy_json and os.path.exists(legacy_json):
+            self.migrate_json(legacy_json)
+
+    def migrate_json(self, json_path: str) -> int:
+        """Import a legacy followed.json ({user_id: iso_timestamp}) and retire it."""
+        with open(json_path) as f:
+            data = json.load(f)
+        rows = [(str(uid), _epoch(datetime.fromisoformat(ts))) for uid, ts in data.items()]
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO follows (user_id, followed_at) VALUES (?, ?)", rows
+            )
+        os.replace(json_path, f"{json_path}.migrated")
+        print(f"Migrated {len(rows)} follows from {json_path}")
+        return len(rows)
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM follows").fetchone()[0]
+
+    def __contains__(self, user_id) -> bool:
+        row = self.db.execute("SELECT 1 FROM follows WHERE user_id = ?", (str(user_id),)).fetchone()
+        return row is not None
+
+    def known(self, user_ids: Iterable) -> set[str]:
+        """Return the subset of user_ids already in the ledger."""
+        ids = list(dict.fromkeys(str(uid) for uid in user_ids))
+        found = set()
+        for start in range(0, len(ids), _CHUNK):
+            chunk = ids[start:start + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(
+                row[0]
+                for row in self.db.execute(f"SELECT user_id FROM follows WHERE user_id IN ({marks})", chunk)
+            )
+        return found
+
+    def record(self, user_id, when: datetime | None = None):
+        """Record a follow; an existing entry keeps its original time."""
+        followed_at = _epoch(when) if when else datetime.now(timezone.utc).timestamp()
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO follows (user_id, followed_at) VALUES (?, ?)",
+                (str(user_id), followed_at),
+            )
+
+    def expired(self, before: datetime) -> Iterator[str]:
+        """Yield non-mutual user ids followed before the given time, oldest first."""
+        rows = self.db.execute(
+            "SELECT user_id FROM follows WHERE followed_at < ? AND mutual = 0 ORDER BY followed_at",
+            (_epoch(before),),
+        ).fetchall()
+        return (row[0] for row in rows)
+
+    def mark_mutual(self, user_ids: Iterable):
+        """Mark follows that followed back so ``expired`` skips them."""
+        with self.db:
+            self.db.executemany(
+                "UPDATE follows SET mutual = 1 WHERE user_id = ?", [(str(uid),) for uid in user_ids]
+            )
+
+    def clear_mutual(self, user_ids: Iterable | None = None):
+        """Unmark follows that stopped following back; None unmarks every follow."""
+        with self.db:
+            if user_ids is None:
+                self.db.execute("UPDATE follows SET mutual = 0 WHERE mutual = 1")
+            else:
+                self.db.executemany(
+                    "UPDATE follows SET mutual = 0 WHERE user_id = ?", [(str(uid),) for uid in user_ids]
+                )
+
+    def has_mutual(self) -> bool:
+        return self.db.execute("SELECT 1 FROM follows WHERE mutual = 1 LIMIT 1").fetchone() is not None
+
+    def remove(self, user_id):
+        with self.db:
+            self.db.execute("DELETE FROM follows WHERE user_id = ?", (str(user_id),))
+
+    def liked(self, tweet_ids: Iterable) -> set[int]:
+        """Return the subset of tweet_ids already liked."""
+        ids = list(dict.fromkeys(int(tid) for tid in tweet_ids))
+        found = set()
+        for start in range(0, len(ids), _CHUNK):
+            chunk = ids[start:start + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(
+                row[0]
+                for row in self.db.execute(f"SELECT tweet_id FROM likes WHERE tweet_id IN ({marks})", chunk)
+            )
+        return found
+
+    def record_likes(self, tweet_ids: Iterable):
+        now = datetime.now(timezone.utc).timestamp()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO likes (tweet_id, liked_at) VALUES (?, ?)",
+                [(int(tid), now) for tid in tweet_ids],
+            )
+
+    def close(self):
+        self.db.close()
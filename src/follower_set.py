@@ -0,0 +1,96 @@
+"""Compact, complete set of follower IDs.
+
+``followers_ids`` returns at most 5,000 IDs per call, so the full list has to
+be read page by page with a cursor. The IDs are kept in a sorted
+``array('q')`` (8 bytes per ID instead of ~100 for a set of strings) and
+membership is a binary search.
+
+A snapshot can be written to disk after each run; ``diff`` walks two sorted
+snapshots in one pass to report new and lost followers.
+"""
+from __future__ import annotations
+
+import os
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import tweepy
+
+FOLLOWER_SNAPSHOT = os.getenv("FOLLOWER_SNAPSHOT", "followers.bin")
+FOLLOWER_PAGE_SIZE = 5000
+
+
+class FollowerSet:
+    def __init__(self, ids: array | None = None):
+        self.ids = ids if ids is not None else array("q")
+
+    @classmethod
+    def from_ids(cls, ids) -> "FollowerSet":
+        """Build from any iterable of integer IDs (duplicates are dropped).
+
+        Sorting and deduplication run on int64 buffers, about 8 bytes per ID.
+        """
+        import numpy as np
+
+        if isinstance(ids, array) and ids.typecode == "q":
+            values = np.frombuffer(ids, dtype=np.int64)
+        else:
+            values = np.fromiter((int(i) for i in ids), dtype=np.int64)
+        unique = array("q")
+        unique.frombytes(memoryview(np.unique(values)).cast("B"))
+        return cls(unique)
+
+    @classmethod
+    def fetch(cls, api: tweepy.API, user_id=None) -> "FollowerSet":
+        """Read every follower ID via cursor pagination."""
+        import tweepy
+
+        ids = array("q")
+        cursor = tweepy.Cursor(api.get_follower_ids, user_id=user_id, count=FOLLOWER_PAGE_SIZE)
+        for page in cursor.pages():
+            ids.extend(page)
+        return cls.from_ids(ids)
+
+    @classmethod
+    def load(cls, path: str = FOLLOWER_SNAPSHOT) -> "FollowerSet | None":
+        if not os.path.exists(path):
+            return None
+        ids = array("q")
+        with open(path, "rb") as f:
+            ids.frombytes(f.read())
+        return cls(ids)
+
+    def save(self, path: str = FOLLOWER_SNAPSHOT):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            self.ids.tofile(f)
+        os.replace(tmp, path)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, user_id) -> bool:
+        uid = int(user_id)
+        i = bisect_left(self.ids, uid)
+        return i < len(self.ids) and self.ids[i] == uid
+
+    def diff(self, previous: "FollowerSet") -> tuple[array, array]:
+        """Return (gained, lost) IDs relative to previous, each sorted."""
+        gained, lost = array("q"), array("q")
+        a, b = self.ids, previous.ids
+        i = j = 0
+        while i < len(a) and j < len(b):
+            if a[i] == b[j]:
+                i += 1
+                j += 1
+            elif a[i] < b[j]:
+                gained.append(a[i])
+                i += 1
+            else:
+                lost.append(b[j])
+                j += 1
+        gained.extend(a[i:])
+        lost.extend(b[j:])
+        return gained, lost
@@ -0,0 +1,92 @@
+"""Shared client for the Meta Graph API used by the Facebook and Instagram bots.
+
+All Graph API traffic goes through one pooled ``requests.Session`` so the TLS
+connection to graph.facebook.com is kept alive between calls (for example the
+Instagram create/publish pair or a loop of comment replies). The API version
+is configured once via ``GRAPH_API_VERSION``.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+GRAPH_API_VERSION = os.getenv("GRAPH_API_VERSION", "v23.0")
+GRAPH_API_POOL_SIZE = int(os.getenv("GRAPH_API_POOL_SIZE", "10"))
+GRAPH_API_RETRIES = int(os.getenv("GRAPH_API_RETRIES", "3"))
+GRAPH_API_TIMEOUT = float(os.getenv("GRAPH_API_TIMEOUT", "30"))
+
+
+class GraphAPI:
+    """Thin wrapper around a keep-alive session for graph.facebook.com.
+
+    GET requests are retried with exponential backoff on connection errors,
+    429 and 5xx responses. POST requests are only retried when the connection
+    could not be established, so a publish is never sent twice.
+    """
+
+    def __init__(
+        self,
+        access_token: str | None = None,
+        version: str = GRAPH_API_VERSION,
+        pool_size: int = GRAPH_API_POOL_SIZE,
+        retries: int = GRAPH_API_RETRIES,
+        timeout: float = GRAPH_API_TIMEOUT,
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.access_token = access_token if access_token is not None else os.getenv("META_ACCESS_TOKEN")
+        self.base_url = f"https://graph.facebook.com/{version}"
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _with_token(self, values: dict | None) -> dict:
+        values = dict(values or {})
+        if self.access_token:
+            values.setdefault("access_token", self.access_token)
+        return values
+
+    def get(self, path: str, params: dict | None = None) -> requests.Response:
+        return self.session.get(self.url(path), params=self._with_token(params), timeout=self.timeout)
+
+    def post(self, path: str, data: dict | None = None, files: dict | None = None) -> requests.Response:
+        return self.session.post(
+            self.url(path), data=self._with_token(data), files=files, timeout=self.timeout
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_default_client: GraphAPI | None = None
+_default_lock = threading.Lock()
+
+
+def get_graph_client() -> GraphAPI:
+    """Return the process-wide GraphAPI client, creating it on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = GraphAPI()
+        return _default_client
@@ -0,0 +1,200 @@
+"""Index of seed images with cached, ready-to-use variants.
+
+The catalog lists ``IMAGE_DIR`` once and records each image's dimensions,
+file size and SHA-256. The index is saved in ``IMAGE_CACHE_DIR`` so unchanged
+files are not re-hashed on the next run. The directory is only re-listed when
+its mtime changes; each file's size and mtime are checked on every refresh.
+
+Two derived variants are produced on first use and cached by content hash:
+
+* ``variation`` – a square PNG under 4 MB, as required by
+  ``openai.Image.create_variation``.
+* ``background`` – a 720x1280 JPEG cover crop for the video bot.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+
+IMAGE_DIR = os.getenv("IMAGE_DIR", "images")
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+VARIATION_MAX_BYTES = 4 * 1024 * 1024
+VARIATION_SIZES = (1024, 512, 256)
+BACKGROUND_SIZE = (720, 1280)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _center_crop(img, ratio: float):
+    """Crop img around its centre to width/height == ratio."""
+    width, height = img.size
+    if width / height > ratio:
+        new_width = int(height * ratio)
+        left = (width - new_width) // 2
+        return img.crop((left, 0, left + new_width, height))
+    new_height = int(width / ratio)
+    top = (height - new_height) // 2
+    return img.crop((0, top, width, top + new_height))
+
+
+def _make_variation(src: str, dest: str):
+    from PIL import Image
+
+    with Image.open(src) as img:
+        square = _center_crop(img.convert("RGBA"), 1.0)
+        for size in VARIATION_SIZES:
+            square.resize((size, size), Image.LANCZOS).save(dest, "PNG")
+            if os.path.getsize(dest) < VARIATION_MAX_BYTES:
+                return
+
+
+def _make_background(src: str, dest: str):
+    from PIL import Image
+
+    with Image.open(src) as img:
+        width, height = BACKGROUND_SIZE
+        cropped = _center_crop(img.convert("RGB"), width / height)
+        cropped.resize(BACKGROUND_SIZE, Image.LANCZOS).save(dest, "JPEG", quality=90)
+
+
+_VARIANTS = {
+    "variation": (".png", _make_variation),
+    "background": (".jpg", _make_background),
+}
+
+
+class ImageCatalog:
+    """Seed images in one directory plus their cached variants."""
+
+    def __init__(self, image_dir: str = IMAGE_DIR, cache_dir: str | None = IMAGE_CACHE_DIR):
+        self.image_dir = image_dir
+        self.cache_dir = cache_dir or os.path.join(image_dir, ".cache")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.entries: dict[str, dict] = {}
+        self._dir_mtime = None
+        self._lock = threading.Lock()
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.index_path)
+
+    def _describe(self, path: str, st: os.stat_result) -> dict:
+        from PIL import Image
+
+        with Image.open(path) as img:
+            width, height = img.size
+        return {
+            "path": path,
+            "width": width,
+            "height": height,
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "sha256": _sha256(path),
+        }
+
+    def _refresh(self):
+        try:
+            dir_mtime = os.stat(self.image_dir).st_mtime_ns
+        except FileNotFoundError:
+            self.entries, self._dir_mtime = {}, None
+            return
+        known = self.entries or self._load_index()
+        # An unchanged directory mtime means no file was added or removed,
+        # but a file overwritten in place still has to be re-described.
+        if dir_mtime == self._dir_mtime:
+            names = list(self.entries)
+        else:
+            names = sorted(n for n in os.listdir(self.image_dir) if n.lower().endswith(IMAGE_EXTENSIONS))
+        entries = {}
+        for name in names:
+            path = os.path.join(self.image_dir, name)
+            try:
+                st = os.stat(path)
+                entry = known.get(name)
+                if not entry or entry["size"] != st.st_size or entry["mtime"] != st.st_mtime_ns:
+                    entry = self._describe(path, st)
+                elif entry["path"] != path:
+                    entry = dict(entry, path=path)
+            except OSError as exc:
+                print(f"Skipping unreadable image {path}:", exc)
+                continue
+            entries[name] = entry
+        changed = entries != known
+        self.entries, self._dir_mtime = entries, dir_mtime
+        if changed:
+            try:
+                self._save_index()
+            except OSError as exc:
+                print("Failed to save image index:", exc)
+
+    def images(self) -> list[dict]:
+        """Return the catalog entries, re-listing the directory if it changed."""
+        with self._lock:
+            self._refresh()
+            return list(self.entries.values())
+
+    def random_image(self) -> str | None:
+        """Return the path of a random seed image, or None if there are none."""
+        with self._lock:
+            self._refresh()
+            if not self.entries:
+                return None
+            return random.choice(list(self.entries.values()))["path"]
+
+    def variant(self, path: str, kind: str) -> str:
+        """Return the path of the cached ``kind`` variant of path, building it if needed."""
+        suffix, build = _VARIANTS[kind]
+        # Already a cached variant of this kind (e.g. from get_random_background).
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.cache_dir) and path.endswith(f"_{kind}{suffix}"):
+            return path
+        with self._lock:
+            self._refresh()
+            entry = self.entries.get(os.path.basename(path))
+            if entry is None or os.path.abspath(entry["path"]) != os.path.abspath(path):
+                entry = self._describe(path, os.stat(path))
+        dest = os.path.join(self.cache_dir, f"{entry['sha256']}_{kind}{suffix}")
+        if not os.path.exists(dest):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+            build(path, tmp)
+            os.replace(tmp, dest)
+        return dest
+
+    def variation_source(self, path: str) -> str:
+        return self.variant(path, "variation")
+
+    def video_background(self, path: str) -> str:
+        return self.variant(path, "background")
+
+
+_catalogs: dict[str, ImageCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_image_catalog(image_dir: str = IMAGE_DIR) -> ImageCatalog:
+    """Return the shared ImageCatalog for image_dir."""
+    key = os.path.abspath(image_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = ImageCatalog(image_dir)
+        return catalog
@@ -11,35 +11,31 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-import requests
-from src.utils import is_spam, generate_context_reply
-
-ACCESS_TOKEN = os.getenv("META_ACCESS_TOKEN")
-IG_BUSINESS_ID = os.getenv("IG_BUSINESS_ID")
+from src.graph_api import get_graph_client
+from src.reply_clusters import cluster_messages, vary_reply
+from src.utils import classify_spam, generate_context_reply
 
 def generate_reply(text: str) -> str:
     """Generate a context-aware reply with CTA."""
     return generate_context_reply(text)
 
 def get_comments(media_id):
-    url = f"https://graph.facebook.com/v17.0/{media_id}/comments?access_token={ACCESS_TOKEN}"
-    return requests.get(url).json()
+    return get_graph_client().get(f"{media_id}/comments").json()
 
 def reply_to_comment(comment_id, message):
-    url = f"https://graph.facebook.com/v17.0/{comment_id}/replies"
-    data = {"message": message, "access_token": ACCESS_TOKEN}
-    return requests.post(url, data=data).json()
+    return get_graph_client().post(f"{comment_id}/replies", data={"message": message}).json()
 
 
 def auto_reply(media_id: str):
     """Reply to all recent comments on a media post."""
     comments = get_comments(media_id).get("data", [])
-    for c in comments:
-        message = c.get("text", "") or c.get("message", "")
-        if is_spam(message):
-            continue
-        reply = generate_reply(message)
-        reply_to_comment(c["id"], reply)
+    messages = [c.get("text", "") or c.get("message", "") for c in comments]
+    wanted = [(c, m) for c, m, spam in zip(comments, messages, classify_spam(messages)) if not spam]
+    # Near-duplicate questions share one generated reply.
+    for cluster in cluster_messages(m for _, m in wanted):
+        reply = generate_reply(wanted[cluster[0]][1])
+        for position, index in enumerate(cluster):
+            reply_to_comment(wanted[index][0]["id"], vary_reply(reply, position))
 
 # Example usage:
 # comments = get_comments("MEDIA_ID_HERE")
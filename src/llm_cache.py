@@ -0,0 +1,204 @@
+"""Content-addressed cache for chat completions.
+
+Responses are keyed on the use case, the model and the prompt after
+whitespace/case normalisation, so the same FAQ question or a retried
+topic/style pair is answered from the cache instead of another API call.
+
+Backends are pluggable via ``LLM_CACHE_BACKEND``:
+
+* ``disk`` (default) – SQLite file at ``LLM_CACHE_PATH`` with LRU eviction
+  once the stored responses exceed ``LLM_CACHE_MAX_BYTES``.
+* ``memory`` – per-process LRU dict, same size bound.
+* ``none`` – caching disabled.
+
+Each use case has its own TTL (``LLM_CACHE_TTL_<USE_CASE>`` in seconds, 0
+disables caching for it). Generated posts get a short TTL so a cached answer
+only covers retries within a run and never turns into a repeated post.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "disk")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+DEFAULT_TTLS = {
+    "reply": 7 * 24 * 3600,
+    "post": 600,
+    "caption": 600,
+}
+
+
+def use_case_ttl(use_case: str) -> float:
+    value = os.getenv(f"LLM_CACHE_TTL_{use_case.upper()}")
+    if value is not None:
+        return float(value)
+    return DEFAULT_TTLS.get(use_case, 3600)
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split()).casefold()
+
+
+def cache_key(use_case: str, model: str, prompt: str) -> str:
+    raw = "\0".join((use_case, model, normalize_prompt(prompt)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU keyed by cache_key."""
+
+    def __init__(self, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, ttl: float) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created = entry
+            if time.time() - created > ttl:
+                del self._entries[key]
+                self._size -= len(value.encode("utf-8"))
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0].encode("utf-8"))
+            self._entries[key] = (value, time.time())
+            self._size += size
+            while self._size > self.max_bytes and self._entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted.encode("utf-8"))
+
+
+class DiskBackend:
+    """SQLite-backed LRU shared by every process using the same file."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key: str, ttl: float) -> str | None:
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            doomed = []
+            for old_key, old_size in self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed"
+            ):
+                if total <= self.max_bytes:
+                    break
+                doomed.append((old_key,))
+                total -= old_size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+
+class LLMCache:
+    """Front end that applies per-use-case TTLs and counts hits and misses."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    def get_or_create(self, use_case: str, model: str, prompt: str, generate: Callable[[], str]) -> str:
+        """Return the cached response for prompt, calling generate() on a miss."""
+        ttl = use_case_ttl(use_case)
+        if self.backend is None or ttl <= 0:
+            return generate()
+        key = cache_key(use_case, model, prompt)
+        try:
+            cached = self.backend.get(key, ttl)
+        except Exception as exc:
+            print("LLM cache read failed:", exc)
+            cached = None
+        if cached is not None:
+            self.hits[use_case] += 1
+            return cached
+        self.misses[use_case] += 1
+        value = generate()
+        try:
+            self.backend.set(key, value)
+        except Exception as exc:
+            print("LLM cache write failed:", exc)
+        return value
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            use_case: {"hits": self.hits[use_case], "misses": self.misses[use_case]}
+            for use_case in sorted(set(self.hits) | set(self.misses))
+        }
+
+
+_cache: LLMCache | None = None
+_cache_lock = threading.Lock()
+
+
+def _make_backend():
+    if LLM_CACHE_BACKEND == "none":
+        return None
+    if LLM_CACHE_BACKEND == "memory":
+        return MemoryBackend()
+    try:
+        return DiskBackend()
+    except sqlite3.Error as exc:
+        print("LLM disk cache unavailable, using memory:", exc)
+        return MemoryBackend()
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide LLMCache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(_make_backend())
+        return _cache
+
+
+def cached_completion(use_case: str, model: str, prompt: str, generate: Callable[[], str]) -> str:
+    """Shortcut for ``get_llm_cache().get_or_create(...)``."""
+    return get_llm_cache().get_or_create(use_case, model, prompt, generate)
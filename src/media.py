@@ -0,0 +1,51 @@
+"""Stream generated media from a URL straight into an upload.
+
+Downloads are read in chunks into a ``SpooledTemporaryFile`` which stays in
+memory and only spills to an anonymous temp file once it grows past
+``MEDIA_SPOOL_LIMIT`` bytes. Nothing is written to a fixed path, so several
+bots can run side by side in the same checkout.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import TYPE_CHECKING, BinaryIO
+
+if TYPE_CHECKING:
+    import requests
+
+MEDIA_SPOOL_LIMIT = int(os.getenv("MEDIA_SPOOL_LIMIT", str(8 * 1024 * 1024)))
+MEDIA_CHUNK_SIZE = 64 * 1024
+MEDIA_TIMEOUT = float(os.getenv("MEDIA_TIMEOUT", "60"))
+
+
+def download_media(url: str, session: requests.Session | None = None) -> BinaryIO:
+    """Return a file-like buffer holding the body of url, positioned at 0.
+
+    The caller owns the buffer and should close it once the upload is done.
+    Raises ``requests.HTTPError`` for non-2xx responses.
+    """
+    if session is None:
+        import requests
+
+        session = requests
+    buf = tempfile.SpooledTemporaryFile(max_size=MEDIA_SPOOL_LIMIT)
+    try:
+        with session.get(url, stream=True, timeout=MEDIA_TIMEOUT) as resp:
+            resp.raise_for_status()
+            for chunk in resp.iter_content(chunk_size=MEDIA_CHUNK_SIZE):
+                buf.write(chunk)
+    except Exception:
+        buf.close()
+        raise
+    buf.seek(0)
+    return buf
+
+
+def media_size(fileobj: BinaryIO) -> int:
+    """Return the size of fileobj in bytes without moving its read position."""
+    pos = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(pos)
+    return size
@@ -2,36 +2,42 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-import requests
+import tempfile
+from concurrent.futures import Future
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-import openai
-from src.video_bot.generate_video import generate_video
-
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from src.llm_cache import cached_completion
+from src.utils import get_openai
 
 HEADERS = {"User-Agent": "meme-generator"}
+# Meme videos rendered in parallel when run as a script.
+MEME_BATCH = int(os.getenv("MEME_BATCH", "1"))
+
 
+def get_trending_meme_title(index: int = 0) -> str:
+    """Return the title of the index-th trending meme from Reddit."""
+    import requests
 
-def get_trending_meme_title() -> str:
-    """Return the title of a trending meme from Reddit."""
     url = "https://www.reddit.com/r/aiMemes/top.json?limit=5&t=day"
     r = requests.get(url, headers=HEADERS)
     if r.ok:
         posts = r.json().get("data", {}).get("children", [])
         if posts:
-            return posts[0]["data"].get("title", "AI meme")
+            return posts[index % len(posts)]["data"].get("title", "AI meme")
     return "AI meme"
 
 
 def generate_image(prompt: str) -> bytes:
     """Use OpenAI to create an image for the meme."""
-    resp = openai.Image.create(prompt=prompt, n=1, size="512x512")
+    import requests
+
+    resp = get_openai().Image.create(prompt=prompt, n=1, size="512x512")
     img_url = resp["data"][0]["url"]
     return requests.get(img_url).content
 
 
 def caption_image(img_bytes: bytes, caption: str, out_path: str = "meme.png") -> str:
+    from PIL import Image, ImageDraw, ImageFont
+
     img = Image.open(BytesIO(img_bytes)).convert("RGB")
     draw = ImageDraw.Draw(img)
     try:
@@ -43,18 +49,42 @@ def caption_image(img_bytes: bytes, caption: str, out_path: str = "meme.png") ->
     return out_path
 
 
-def create_meme_video():
-    trend = get_trending_meme_title()
-    caption_resp = openai.ChatCompletion.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": f"Write a witty short caption about {trend}"}],
-    )
-    caption = caption_resp["choices"][0]["message"]["content"].strip()
+def create_meme_video(output_path: str = "meme_video.mp4", index: int = 0, queue=None) -> Future:
+    """Build a captioned meme and submit its video to the render queue.
+
+    Returns the render future; its result is the render queue's result dict.
+    The captioned image is written to a temp file that is removed once the
+    render has finished.
+    """
+    from src.video_bot.render_queue import RenderJob, get_render_queue
+
+    trend = get_trending_meme_title(index)
+    prompt = f"Write a witty short caption about {trend}"
+
+    def _generate() -> str:
+        caption_resp = get_openai().ChatCompletion.create(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return caption_resp["choices"][0]["message"]["content"].strip()
+
+    caption = cached_completion("caption", "gpt-4o", prompt, _generate)
     img_bytes = generate_image(trend)
-    image_path = caption_image(img_bytes, caption)
-    generate_video(caption, image_path=image_path, output_path="meme_video.mp4")
-    print("Created meme video meme_video.mp4")
+    fd, image_path = tempfile.mkstemp(prefix="meme-", suffix=".png")
+    os.close(fd)
+    caption_image(img_bytes, caption, image_path)
+    future = (queue or get_render_queue()).submit(RenderJob(caption, image_path, output_path))
+    future.add_done_callback(lambda _: os.remove(image_path))
+    return future
 
 
 if __name__ == "__main__":
-    create_meme_video()
+    from src.video_bot.render_queue import get_render_queue
+
+    outputs = ["meme_video.mp4"] if MEME_BATCH <= 1 else [f"meme_video_{i + 1}.mp4" for i in range(MEME_BATCH)]
+    futures = [create_meme_video(path, index=i) for i, path in enumerate(outputs)]
+    for future in futures:
+        result = future.result()
+        if result["status"] == "ok":
+            print(f"Created meme video {result['output_path']}")
+    get_render_queue().close()
@@ -1,18 +1,41 @@
+from __future__ import annotations
+
 import os
 import random
 import smtplib
+import sys
+import threading
+import time
 import traceback
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
+from functools import lru_cache
+from typing import TYPE_CHECKING, BinaryIO
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.content_queue import ClaimedPost
+from src.graph_api import get_graph_client
+from src.image_catalog import get_image_catalog
+from src.llm_cache import cached_completion
+from src.media import download_media, media_size
+from src.rate_limit import rate_limited
+from src.topic_store import random_topic, record_topic
+from src.utils import get_openai
+
+if TYPE_CHECKING:
+    import requests
 
-import openai
-import requests
-import tweepy
-
-openai.api_key = os.getenv("OPENAI_API_KEY")
 TOPIC_FILE = os.getenv("TOPIC_FILE", "topics.txt")
 IMAGE_DIR = os.getenv("IMAGE_DIR", "images")
 LOG_FILE = os.getenv("LOG_FILE", "log.txt")
+# Number of platforms posted to in parallel; 1 posts one platform at a time.
+POST_WORKERS = int(os.getenv("POST_WORKERS", "4"))
+# Seconds each platform pipeline may take before its worker process is killed.
+POST_TIMEOUT = float(os.getenv("POST_TIMEOUT", "300"))
+# Seconds a successful credential check is trusted before it is re-verified.
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "900"))
+# Platforms post_content can publish to; the facebook and tiktok publishers are disabled.
+PUBLISHERS = {"twitter", "instagram"}
 
 
 def log(message: str):
@@ -26,16 +49,22 @@ TWITTER_API_SECRET = os.getenv("TWITTER_API_SECRET")
 TWITTER_ACCESS_TOKEN = os.getenv("TWITTER_ACCESS_TOKEN")
 TWITTER_ACCESS_SECRET = os.getenv("TWITTER_ACCESS_SECRET")
 
-if all([TWITTER_API_KEY, TWITTER_API_SECRET, TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_SECRET]):
-    _tw_auth = tweepy.OAuth1UserHandler(
+
+@lru_cache(maxsize=None)
+def get_twitter_api():
+    """Return the rate-limited tweepy API, or None without credentials."""
+    if not all([TWITTER_API_KEY, TWITTER_API_SECRET, TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_SECRET]):
+        return None
+    import tweepy
+
+    auth = tweepy.OAuth1UserHandler(
         TWITTER_API_KEY,
         TWITTER_API_SECRET,
         TWITTER_ACCESS_TOKEN,
         TWITTER_ACCESS_SECRET,
     )
-    twitter_api = tweepy.API(_tw_auth)
-else:
-    twitter_api = None
+    return rate_limited(tweepy.API(auth))
+
 
 # Meta credentials for Facebook and Instagram
 META_ACCESS_TOKEN = os.getenv("META_ACCESS_TOKEN")
@@ -68,7 +97,54 @@ def send_error_email(subject: str, body: str):
         print("Failed to send error email:", exc)
 
 
-def twitter_authenticated() -> bool:
+# platform -> monotonic time of the last successful credential check
+_auth_cache: dict[str, float] = {}
+_auth_lock = threading.Lock()
+
+
+def _cached_auth(platform: str, check) -> bool:
+    """Return True if ``check()`` succeeded for platform within AUTH_CACHE_TTL.
+
+    Only successful checks are cached, so a transient failure is retried on
+    the next call. Entries are dropped early by :func:`invalidate_auth`.
+    """
+    with _auth_lock:
+        checked_at = _auth_cache.get(platform)
+    if checked_at is not None and time.monotonic() - checked_at < AUTH_CACHE_TTL:
+        return True
+    ok = check()
+    with _auth_lock:
+        if ok:
+            _auth_cache[platform] = time.monotonic()
+        else:
+            _auth_cache.pop(platform, None)
+    return ok
+
+
+def invalidate_auth(platform: str | None = None):
+    """Forget the cached credential status for platform (or all platforms)."""
+    with _auth_lock:
+        if platform is None:
+            _auth_cache.clear()
+        else:
+            _auth_cache.pop(platform, None)
+
+
+def _check_auth_response(platform: str, resp: requests.Response) -> requests.Response:
+    """Invalidate cached credentials when a real API call is rejected.
+
+    Raises for any error response, so the post is reported as failed.
+    """
+    if resp.status_code in (401, 403):
+        invalidate_auth(platform)
+        log(f"{platform} rejected credentials with {resp.status_code}")
+    if not resp.ok:
+        raise RuntimeError(f"{platform} API error {resp.status_code}: {resp.text[:500]}")
+    return resp
+
+
+def _verify_twitter() -> bool:
+    twitter_api = get_twitter_api()
     if not twitter_api:
         return False
     try:
@@ -79,32 +155,40 @@ def twitter_authenticated() -> bool:
         return False
 
 
-def facebook_authenticated() -> bool:
+def _verify_facebook() -> bool:
     if not (META_ACCESS_TOKEN and FB_PAGE_ID):
         return False
     try:
-        resp = requests.get(
-            f"https://graph.facebook.com/v17.0/me?access_token={META_ACCESS_TOKEN}"
-        )
+        resp = get_graph_client().get("me")
         return resp.status_code == 200
     except Exception as exc:
         print("Facebook auth failed:", exc)
         return False
 
 
-def instagram_authenticated() -> bool:
+def _verify_instagram() -> bool:
     if not (META_ACCESS_TOKEN and IG_USER_ID):
         return False
     try:
-        resp = requests.get(
-            f"https://graph.facebook.com/v17.0/{IG_USER_ID}?fields=id&access_token={META_ACCESS_TOKEN}"
-        )
+        resp = get_graph_client().get(IG_USER_ID, params={"fields": "id"})
         return resp.status_code == 200
     except Exception as exc:
         print("Instagram auth failed:", exc)
         return False
 
 
+def twitter_authenticated() -> bool:
+    return _cached_auth("twitter", _verify_twitter)
+
+
+def facebook_authenticated() -> bool:
+    return _cached_auth("facebook", _verify_facebook)
+
+
+def instagram_authenticated() -> bool:
+    return _cached_auth("instagram", _verify_instagram)
+
+
 def tiktok_authenticated() -> bool:
     if not TIKTOK_ACCESS_TOKEN:
         return False
@@ -157,26 +241,21 @@ def generate_random_times(start_hour: int = 8, end_hour: int = 22, count: int =
 
 
 def get_random_topic() -> str:
-    if not os.path.exists(TOPIC_FILE):
-        return "our AI app"
-    with open(TOPIC_FILE, "r") as f:
-        topics = [line.strip() for line in f if line.strip()]
-    return random.choice(topics) if topics else "our AI app"
+    return random_topic(TOPIC_FILE, "our AI app", record=False)
 
 
 def get_seed_image() -> str | None:
-    if not os.path.isdir(IMAGE_DIR):
-        return None
-    imgs = [os.path.join(IMAGE_DIR, f) for f in os.listdir(IMAGE_DIR) if f.lower().endswith((".png", ".jpg", ".jpeg"))]
-    return random.choice(imgs) if imgs else None
+    return get_image_catalog(IMAGE_DIR).random_image()
 
 
 def generate_image(seed_image: str | None) -> str | None:
     if not seed_image:
         return None
     try:
-        with open(seed_image, "rb") as img:
-            resp = openai.Image.create_variation(image=img, n=1, size="1024x1024")
+        # Variations need a square PNG under 4 MB; the catalog caches one per image.
+        source = get_image_catalog(IMAGE_DIR).variation_source(seed_image)
+        with open(source, "rb") as img:
+            resp = get_openai().Image.create_variation(image=img, n=1, size="1024x1024")
         return resp["data"][0]["url"]
     except Exception as exc:
         print("Image generation failed:", exc)
@@ -187,18 +266,37 @@ def generate_ai_post(topic: str, style: str, platform: str) -> str:
     prompt = f"Write a {style} social media post about {topic}."
     if platform == "twitter":
         prompt += " Limit to 280 characters."
-    response = openai.ChatCompletion.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return response["choices"][0]["message"]["content"].strip()
 
+    def _generate() -> str:
+        response = get_openai().ChatCompletion.create(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return response["choices"][0]["message"]["content"].strip()
+
+    return cached_completion("post", "gpt-4o", prompt, _generate)
+
+
+def post_to_twitter(message: str, image_path: str | None = None, image_file: BinaryIO | None = None):
+    """Tweet message with an optional image given as a path or an open buffer.
 
-def post_to_twitter(message: str, image_path: str | None = None):
+    Raises if the tweet could not be posted.
+    """
     if not twitter_authenticated():
-        return
+        raise RuntimeError("Twitter credentials are missing or invalid")
+    import tweepy
+
+    twitter_api = get_twitter_api()
     media_id = None
-    if image_path and os.path.exists(image_path):
+    if image_file is not None:
+        try:
+            if media_size(image_file) == 0:
+                raise Exception("Image buffer is empty.")
+            media = twitter_api.media_upload("image.png", file=image_file)
+            media_id = media.media_id
+        except Exception as exc:
+            print("Failed to upload media:", exc)
+    elif image_path and os.path.exists(image_path):
         try:
             if os.path.getsize(image_path) == 0:
                 raise Exception("Image file is empty.")
@@ -207,41 +305,54 @@ def post_to_twitter(message: str, image_path: str | None = None):
         except Exception as exc:
             print("Failed to upload media:", exc)
             image_path = None
-    if media_id:
-        twitter_api.update_status(status=message, media_ids=[media_id])
-    else:
-        twitter_api.update_status(status=message)
+    try:
+        if media_id:
+            twitter_api.update_status(status=message, media_ids=[media_id])
+        else:
+            twitter_api.update_status(status=message)
+    except (tweepy.Unauthorized, tweepy.Forbidden):
+        invalidate_auth("twitter")
+        raise
     log("Posted to twitter")
 
 
-def post_to_facebook(message: str, image_url: str | None = None, image_path: str | None = None):
+def post_to_facebook(
+    message: str,
+    image_url: str | None = None,
+    image_path: str | None = None,
+    image_file: BinaryIO | None = None,
+):
     if not facebook_authenticated():
-        return
-    if image_path:
-        url = f"https://graph.facebook.com/v17.0/{FB_PAGE_ID}/photos"
+        raise RuntimeError("Facebook credentials are missing or invalid")
+    graph = get_graph_client()
+    if image_file is not None:
+        resp = graph.post(f"{FB_PAGE_ID}/photos", data={"caption": message}, files={"source": ("image.png", image_file)})
+    elif image_path:
         with open(image_path, "rb") as img:
-            requests.post(url, data={"caption": message, "access_token": META_ACCESS_TOKEN}, files={"source": img})
+            resp = graph.post(f"{FB_PAGE_ID}/photos", data={"caption": message}, files={"source": img})
     elif image_url:
-        url = f"https://graph.facebook.com/v17.0/{FB_PAGE_ID}/photos"
-        requests.post(url, data={"caption": message, "url": image_url, "access_token": META_ACCESS_TOKEN})
+        resp = graph.post(f"{FB_PAGE_ID}/photos", data={"caption": message, "url": image_url})
     else:
-        url = f"https://graph.facebook.com/v17.0/{FB_PAGE_ID}/feed"
-        requests.post(url, data={"message": message, "access_token": META_ACCESS_TOKEN})
+        resp = graph.post(f"{FB_PAGE_ID}/feed", data={"message": message})
+    _check_auth_response("facebook", resp)
     log("Posted to facebook")
 
 
 def post_to_instagram(message: str, image_url: str | None = None):
     if not instagram_authenticated():
-        return
-    create_url = f"https://graph.facebook.com/v17.0/{IG_USER_ID}/media"
-    payload = {"caption": message, "access_token": META_ACCESS_TOKEN}
+        raise RuntimeError("Instagram credentials are missing or invalid")
+    graph = get_graph_client()
+    payload = {"caption": message}
     if image_url:
         payload["image_url"] = image_url
-    resp = requests.post(create_url, data=payload)
+    resp = _check_auth_response("instagram", graph.post(f"{IG_USER_ID}/media", data=payload))
     creation_id = resp.json().get("id")
-    if creation_id:
-        publish_url = f"https://graph.facebook.com/v17.0/{IG_USER_ID}/media_publish"
-        requests.post(publish_url, data={"creation_id": creation_id, "access_token": META_ACCESS_TOKEN})
+    if not creation_id:
+        raise RuntimeError(f"Instagram returned no media container: {resp.text[:500]}")
+    _check_auth_response(
+        "instagram",
+        graph.post(f"{IG_USER_ID}/media_publish", data={"creation_id": creation_id}),
+    )
     log("Posted to instagram")
 
 
@@ -268,58 +379,152 @@ def post_to_instagram(message: str, image_url: str | None = None):
 #     log("Posted to tiktok")
 
 
-def post_content(platform: str):
+def post_content(platform: str) -> str:
+    """Generate and publish one post. Returns "posted", "skipped" or "failed"."""
+    if platform not in PUBLISHERS:
+        log(f"Skipped {platform}: no publisher")
+        return "skipped"
     try:
         if platform == "twitter" and not twitter_authenticated():
             log("Skipped twitter due to auth failure")
-            return
+            return "skipped"
         if platform == "facebook" and not facebook_authenticated():
             log("Skipped facebook due to auth failure")
-            return
+            return "skipped"
         if platform == "instagram" and not instagram_authenticated():
             log("Skipped instagram due to auth failure")
-            return
+            return "skipped"
 #        if platform == "tiktok" and not tiktok_authenticated():
 #            log("Skipped tiktok due to auth failure")
-#            return
-        style = random.choice(["funny", "serious", "update"])
-        topic = get_random_topic()
-        content = generate_ai_post(topic, style, platform)
-        seed_image = get_seed_image() if platform in {"facebook", "instagram", "twitter"} else None
-        image_url = generate_image(seed_image) if seed_image else None
-
-        if platform == "twitter":
-            img_path = None
-            if image_url and image_url.startswith("http"):
+#            return "skipped"
+        with ClaimedPost(platform) as claim:
+            if claim.post:
+                style, topic, content = claim.post["style"], claim.post["topic"], claim.post["text"]
+            else:
+                style = random.choice(["funny", "serious", "update"])
+                topic = get_random_topic()
+                content = generate_ai_post(topic, style, platform)
+            seed_image = get_seed_image() if platform in {"facebook", "instagram", "twitter"} else None
+            image_url = generate_image(seed_image) if seed_image else None
+
+            if platform == "twitter":
+                image_file = None
+                if image_url and image_url.startswith("http"):
+                    try:
+                        image_file = download_media(image_url)
+                    except Exception as exc:
+                        print("Failed to download image:", exc)
                 try:
-                    img_path = os.path.join(IMAGE_DIR, "tw_dl.jpg")
-                    r = requests.get(image_url)
-                    with open(img_path, "wb") as f:
-                        f.write(r.content)
-                except Exception:
-                    img_path = None
-            post_to_twitter(content, img_path)
-        # elif platform == "facebook":
-        #     post_to_facebook(content, image_url=image_url)
-        elif platform == "instagram":
-            post_to_instagram(content, image_url=image_url)
-#        elif platform == "tiktok":
-#            post_to_tiktok(content)
+                    post_to_twitter(content, image_file=image_file)
+                finally:
+                    if image_file is not None:
+                        image_file.close()
+            # elif platform == "facebook":
+            #     post_to_facebook(content, image_url=image_url)
+            elif platform == "instagram":
+                post_to_instagram(content, image_url=image_url)
+#            elif platform == "tiktok":
+#                post_to_tiktok(content)
+            claim.published = True
+        record_topic(TOPIC_FILE, topic)
         print(
             f"Posted on {platform} at {datetime.now().isoformat()} with style: {style} topic: {topic}"
         )
+        return "posted"
     except Exception as exc:
         err = traceback.format_exc()
         send_error_email(f"Post to {platform} failed", err)
         print(f"Failed to post on {platform}:", exc)
+        return "failed"
 
 
-def post_to_all_platforms() -> None:
-    """Immediately post content to all available platforms."""
-    platforms = ["twitter", "instagram"]  # "facebook" disabled, "tiktok" removed
-    for platform in platforms:
-        post_content(platform)
+def _post_in_process(platform: str, results):
+    """Worker process entry point: post to one platform and report the outcome."""
+    results.put((platform, post_content(platform)))
 
 
+def _collect(platform: str, outcome: str, running: dict, results: dict[str, str]):
+    """Record a worker's reported outcome unless the platform was already settled."""
+    if platform not in running:
+        return
+    results[platform] = outcome
+    running.pop(platform)[0].join()
+
+
+def _post_in_processes(platforms: list[str], workers: int, timeouts: dict[str, float]) -> dict[str, str]:
+    import multiprocessing
+    import queue
+
+    ctx = multiprocessing.get_context("spawn")
+    outcomes = ctx.Queue()
+    waiting = list(platforms)
+    running = {}  # platform -> (process, deadline)
+    results = {}
+    while waiting or running:
+        while waiting and len(running) < workers:
+            platform = waiting.pop(0)
+            proc = ctx.Process(target=_post_in_process, args=(platform, outcomes), name=f"post-{platform}")
+            proc.start()
+            running[platform] = (proc, time.monotonic() + timeouts.get(platform, POST_TIMEOUT))
+        next_deadline = min(deadline for _, deadline in running.values())
+        try:
+            platform, outcome = outcomes.get(timeout=min(1.0, max(0.0, next_deadline - time.monotonic())))
+        except queue.Empty:
+            pass
+        else:
+            _collect(platform, outcome, running, results)
+            continue
+        now = time.monotonic()
+        for platform, (proc, deadline) in list(running.items()):
+            if platform not in running:
+                continue
+            if now >= deadline:
+                # Killing the worker stops the post, so nothing lands after it is reported.
+                proc.kill()
+                proc.join()
+                del running[platform]
+                results[platform] = "timeout"
+                log(f"Timed out posting to {platform}")
+                send_error_email(
+                    f"Post to {platform} timed out",
+                    f"Stopped after {timeouts.get(platform, POST_TIMEOUT)}s",
+                )
+            elif not proc.is_alive():
+                # The worker may have reported just after the get() timed out.
+                while True:
+                    try:
+                        _collect(*outcomes.get_nowait(), running, results)
+                    except queue.Empty:
+                        break
+                if platform not in running:
+                    continue
+                del running[platform]
+                results[platform] = "failed"
+                log(f"Posting to {platform} exited with code {proc.exitcode}")
+    return {platform: results[platform] for platform in platforms}
+
+
+def post_to_all_platforms(
+    workers: int = POST_WORKERS,
+    timeouts: dict[str, float] | None = None,
+) -> dict[str, str]:
+    """Immediately post content to all available platforms.
+
+    Each platform pipeline runs in its own worker process, up to ``workers``
+    at a time, so a slow LLM call or upload on one platform does not hold up
+    the others. ``timeouts`` maps a platform to the seconds it may take
+    (defaulting to ``POST_TIMEOUT``); a pipeline that overruns is killed and
+    reported as "timeout", also when ``workers`` is 1 and the platforms are
+    posted one after another. Returns a mapping of platform to its outcome.
+    """
+    platforms = ["twitter", "instagram"]  # "facebook" disabled, "tiktok" removed
+    results = _post_in_processes(platforms, max(workers, 1), timeouts or {})
+    log("Run results: " + ", ".join(f"{p}={r}" for p, r in results.items()))
+    return results
+
 if __name__ == "__main__":
-    post_to_all_platforms()
+    # Run through the package module so the worker processes unpickle
+    # src.post_scheduler functions rather than __main__ ones.
+    from src import post_scheduler
+
+    post_scheduler.post_to_all_platforms()
@@ -0,0 +1,169 @@
+"""Rate-limit-aware scheduling for tweepy ``API`` (v1.1) and ``Client`` (v2).
+
+Wrap a tweepy object with :func:`rate_limited` and every method call goes
+through a per-endpoint token bucket. Buckets are seeded from the
+``x-rate-limit-limit``, ``x-rate-limit-remaining`` and ``x-rate-limit-reset``
+headers of real responses (captured with a session response hook). Calls are
+paced across the window: the remaining quota is spread evenly over the time
+left until the reset, with bursts of up to ``RATE_LIMIT_BURST`` calls, so a
+busy run does not empty a bucket and then sit out the rest of the window. If
+a 429 still comes back the call waits for the reset and is retried; a 429
+without a usable reset time waits for ``Retry-After`` or
+``RATE_LIMIT_BACKOFF`` seconds.
+
+All wrapped clients share one scheduler per process, so running replies and
+engagement back to back spends a single, known quota. ``quota()`` returns the
+current state for logging or monitoring.
+"""
+import functools
+import os
+import threading
+import time
+
+RATE_LIMIT_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "2"))
+# Longest single wait for a window reset before giving up on the call.
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "900"))
+# Back-off after a 429 that carries no reset time.
+RATE_LIMIT_BACKOFF = float(os.getenv("RATE_LIMIT_BACKOFF", "900"))
+# Calls that may go out back to back before pacing spaces them out.
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "3"))
+
+
+def _retry_after(headers) -> float:
+    try:
+        return max(float(headers["retry-after"]), 1.0)
+    except (KeyError, TypeError, ValueError):
+        return RATE_LIMIT_BACKOFF
+
+
+class RateLimitScheduler:
+    """Token buckets keyed by endpoint (the tweepy method name)."""
+
+    def __init__(self, max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.max_wait = max_wait
+        self._buckets: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._current = threading.local()
+
+    def acquire(self, endpoint: str):
+        """Take one token for endpoint, pacing calls and sleeping until the reset if empty."""
+        paced = False
+        while True:
+            with self._lock:
+                bucket = self._buckets.get(endpoint)
+                now = time.time()
+                if bucket is None:
+                    return
+                if now >= bucket["reset"]:
+                    bucket["remaining"] = bucket["limit"]
+                    bucket["reset"] = now + 15 * 60
+                    bucket["next"] = now
+                if bucket["remaining"] > 0:
+                    # Spread what is left evenly over the rest of the window.
+                    interval = (bucket["reset"] - now) / bucket["remaining"]
+                    due = max(bucket.get("next", now), now)
+                    wait = due - now - (RATE_LIMIT_BURST - 1) * interval
+                    # Pacing never fails a call: if the spacing is longer
+                    # than max_wait the token is spent now instead.
+                    if paced or wait <= 0 or wait > self.max_wait:
+                        bucket["remaining"] -= 1
+                        bucket["next"] = due + interval
+                        return
+                    paced = True
+                else:
+                    wait = bucket["reset"] - now + 1
+                    paced = False
+            if not paced:
+                if wait > self.max_wait + 1:
+                    import tweepy
+
+                    raise tweepy.TweepyException(f"Rate limit for {endpoint} resets in {wait:.0f}s")
+                print(f"⏳ Waiting {wait:.0f}s for {endpoint} rate limit")
+            time.sleep(wait)
+
+    def update(self, endpoint: str, headers):
+        """Seed or correct the bucket for endpoint from response headers."""
+        try:
+            limit = int(headers["x-rate-limit-limit"])
+            remaining = int(headers["x-rate-limit-remaining"])
+            reset = float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            bucket = self._buckets.setdefault(endpoint, {})
+            bucket.update(limit=limit, remaining=max(remaining, 0), reset=reset)
+
+    def on_response(self, response, *args, **kwargs):
+        endpoint = getattr(self._current, "endpoint", None)
+        if endpoint:
+            self.update(endpoint, response.headers)
+        return response
+
+    def call(self, endpoint: str, func, *args, **kwargs):
+        import tweepy
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.acquire(endpoint)
+            previous = getattr(self._current, "endpoint", None)
+            self._current.endpoint = endpoint
+            try:
+                return func(*args, **kwargs)
+            except tweepy.TooManyRequests as exc:
+                headers = exc.response.headers
+                self.update(endpoint, headers)
+                with self._lock:
+                    now = time.time()
+                    bucket = self._buckets.setdefault(endpoint, {"limit": 1, "remaining": 0, "reset": now})
+                    bucket["remaining"] = 0
+                    # No reset in the future to wait for: back off instead
+                    # of refilling the bucket and retrying at once.
+                    if bucket["reset"] <= now:
+                        bucket["reset"] = now + _retry_after(headers)
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+            finally:
+                self._current.endpoint = previous
+
+    def quota(self) -> dict[str, dict]:
+        """Return a snapshot of limit/remaining/reset per endpoint."""
+        with self._lock:
+            return {endpoint: dict(bucket) for endpoint, bucket in self._buckets.items()}
+
+
+class RateLimitedClient:
+    """Proxy that routes every public method of a tweepy client through a scheduler."""
+
+    def __init__(self, client, scheduler: RateLimitScheduler):
+        self._client = client
+        self._scheduler = scheduler
+        client.session.hooks["response"].append(scheduler.on_response)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        # functools.wraps copies pagination_mode so tweepy.Cursor still works.
+        @functools.wraps(attr)
+        def wrapper(*args, **kwargs):
+            return self._scheduler.call(name, attr, *args, **kwargs)
+
+        return wrapper
+
+
+_scheduler = RateLimitScheduler()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    return _scheduler
+
+
+def rate_limited(client):
+    """Wrap a tweepy ``API`` or ``Client`` with the shared scheduler."""
+    if client is None or isinstance(client, RateLimitedClient):
+        return client
+    return RateLimitedClient(client, _scheduler)
+
+
+def quota() -> dict[str, dict]:
+    return _scheduler.quota()
@@ -0,0 +1,130 @@
+"""Group near-duplicate questions so each group costs one LLM reply.
+
+Messages are normalised (handles, links, punctuation and filler words
+removed), shingled into character trigrams and summarised with a 32-value
+MinHash. Locality-sensitive hashing over 8 bands of 4 values finds candidate
+matches in constant time per message, and a candidate joins a cluster when
+its estimated Jaccard similarity to the cluster's first message reaches
+``CLUSTER_THRESHOLD`` and the two ask about the same specifics: identical
+numbers, and no content word in one without a close spelling in the other.
+"is it free?", "Is this app free??" and "free?" all land in the same
+cluster, while "iphone 12" / "iphone 15" or "cost" / "cost in europe" do not.
+"""
+import os
+import random
+import re
+import zlib
+from difflib import SequenceMatcher
+from typing import Iterable
+
+CLUSTER_THRESHOLD = float(os.getenv("CLUSTER_THRESHOLD", "0.7"))
+# Words this similar (difflib ratio) count as the same word spelled differently.
+CLUSTER_WORD_MATCH = 0.8
+
+_NUM_HASHES = 32
+_BANDS = 8
+_ROWS = _NUM_HASHES // _BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(_NUM_HASHES)]
+
+_NOISE = re.compile(r"@\w+|https?://\S+|[^\w\s]")
+_STOPWORDS = frozenset(
+    "a an the is it this that are do does can could will would you your u i me my we "
+    "there any app to of for on in and or please pls plz hi hello hey just so".split()
+)
+
+# Friendly openers rotated over a cluster so identical answers don't read as copy-paste.
+OPENERS = ["", "Great question! ", "Thanks for asking! ", "Good one! "]
+
+
+def normalize_question(text: str) -> str:
+    words = _NOISE.sub(" ", text.casefold()).split()
+    kept = [w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words if w not in _STOPWORDS]
+    return " ".join(kept or words)
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    """Return the MinHash signature of text's character trigrams."""
+    padded = f" {text} "
+    shingles = {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def _close_word(word: str, others: set[str]) -> bool:
+    return any(SequenceMatcher(None, word, other).ratio() >= CLUSTER_WORD_MATCH for other in others)
+
+
+def same_specifics(key_a: str, key_b: str) -> bool:
+    """True if two normalised questions share their numbers and content words."""
+    words_a, words_b = set(key_a.split()), set(key_b.split())
+    numbers_a = {w for w in words_a if any(ch.isdigit() for ch in w)}
+    numbers_b = {w for w in words_b if any(ch.isdigit() for ch in w)}
+    if numbers_a != numbers_b:
+        return False
+    only_a, only_b = words_a - words_b - numbers_a, words_b - words_a - numbers_b
+    return all(_close_word(w, only_b) for w in only_a) and all(_close_word(w, only_a) for w in only_b)
+
+
+def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / _NUM_HASHES
+
+
+class ReplyClusterer:
+    """Online clustering: ``add`` returns the cluster id for each new message."""
+
+    def __init__(self, threshold: float = CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        self.signatures: list[tuple[int, ...]] = []
+        self.keys: list[str] = []
+        self._exact: dict[str, int] = {}
+        self._buckets: dict[tuple, list[int]] = {}
+
+    def add(self, text: str) -> int:
+        key = normalize_question(text)
+        if key in self._exact:
+            return self._exact[key]
+        sig = minhash(key)
+        bands = [(b, sig[b * _ROWS:(b + 1) * _ROWS]) for b in range(_BANDS)]
+        best, best_score = None, self.threshold
+        for band in bands:
+            for cid in self._buckets.get(band, ()):
+                score = similarity(sig, self.signatures[cid])
+                if score >= best_score and same_specifics(key, self.keys[cid]):
+                    best, best_score = cid, score
+        if best is None:
+            best = len(self.signatures)
+            self.signatures.append(sig)
+            self.keys.append(key)
+            for band in bands:
+                self._buckets.setdefault(band, []).append(best)
+        self._exact[key] = best
+        return best
+
+
+def cluster_messages(texts: Iterable[str], threshold: float = CLUSTER_THRESHOLD) -> list[list[int]]:
+    """Return clusters of indices into texts, each in input order."""
+    clusterer = ReplyClusterer(threshold)
+    clusters: dict[int, list[int]] = {}
+    for i, text in enumerate(texts):
+        clusters.setdefault(clusterer.add(text), []).append(i)
+    return list(clusters.values())
+
+
+def vary_reply(reply: str, position: int, limit: int | None = None) -> str:
+    """Lightly vary a shared reply for the position-th member of its cluster.
+
+    With a character limit the opener is left out when it would not fit, and
+    a reply that is too long on its own is cut at a word and ends in "…".
+    """
+    varied = OPENERS[position % len(OPENERS)] + reply
+    if limit is None or len(varied) <= limit:
+        return varied
+    if len(reply) <= limit:
+        return reply
+    cut = reply[:limit - 1]
+    if " " in cut[limit // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip() + "…"
@@ -0,0 +1,188 @@
+"""Plan posting slots for many accounts over several days in one pass.
+
+Each account is a dict describing one brand on one platform::
+
+    {"name": "acme", "platform": "twitter", "tz": "America/New_York",
+     "start_hour": 8, "end_hour": 22, "quiet_hours": [[12, 13]],
+     "daily_cap": 3, "min_gap": 90}
+
+Every key except ``platform`` is optional and falls back to the ``SLOT_*``
+environment defaults; ``daily_cap`` defaults to the per-platform cap in
+``SLOT_DAILY_CAPS``. Hours are local to ``tz`` and a window or quiet range may
+wrap past midnight (``[22, 6]``).
+
+Schedules for all accounts and days are drawn together with NumPy: each
+(account, day) row gets a boolean mask of allowed minutes, ``k`` sorted draws
+are taken in a shrunken range and spread apart by ``min_gap`` so the spacing
+holds by construction, and the draws are mapped back to real minutes through
+the mask. Nothing loops over seconds or minutes in Python.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+SLOT_START_HOUR = float(os.getenv("SLOT_START_HOUR", "8"))
+SLOT_END_HOUR = float(os.getenv("SLOT_END_HOUR", "22"))
+# Comma separated local hour ranges with no posts, e.g. "12-13,23-6".
+SLOT_QUIET_HOURS = os.getenv("SLOT_QUIET_HOURS", "")
+SLOT_MIN_GAP_MINUTES = int(os.getenv("SLOT_MIN_GAP_MINUTES", "90"))
+SLOT_DAILY_CAPS = os.getenv("SLOT_DAILY_CAPS", "twitter:3,instagram:1,facebook:1,tiktok:1")
+SLOT_DEFAULT_CAP = int(os.getenv("SLOT_DEFAULT_CAP", "3"))
+SLOT_HORIZON_DAYS = int(os.getenv("SLOT_HORIZON_DAYS", "2"))
+# IANA zone name; empty means the machine's local time.
+SLOT_TZ = os.getenv("SLOT_TZ", "")
+
+# account indexes into the list passed to plan_slots; when is UTC.
+SLOT_DTYPE = np.dtype([("account", np.int32), ("when", "datetime64[s]")])
+
+_MINUTES = np.arange(24 * 60)
+
+
+def _parse_caps(spec: str) -> dict[str, int]:
+    caps = {}
+    for part in spec.split(","):
+        if ":" in part:
+            platform, cap = part.split(":", 1)
+            caps[platform.strip()] = int(cap)
+    return caps
+
+
+def _parse_ranges(spec: str) -> list[list[float]]:
+    ranges = []
+    for part in spec.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ranges.append([float(start), float(end)])
+    return ranges
+
+
+def _zone(name: str | None) -> tzinfo:
+    if name:
+        return ZoneInfo(name)
+    return datetime.now().astimezone().tzinfo
+
+
+def _window(start, end) -> np.ndarray:
+    """Minute mask for local hour ranges; start/end may be arrays and may wrap midnight."""
+    s = np.asarray(start, dtype=float)[..., None] * 60
+    e = np.asarray(end, dtype=float)[..., None] * 60
+    inside = (_MINUTES >= s) & (_MINUTES < e)
+    wrapped = (_MINUTES >= s) | (_MINUTES < e)
+    return np.where(e > s, inside, wrapped)
+
+
+def daily_cap(account: dict) -> int:
+    """Posts per day allowed for an account."""
+    return int(account.get("daily_cap", _parse_caps(SLOT_DAILY_CAPS).get(account["platform"], SLOT_DEFAULT_CAP)))
+
+
+def min_gap(account: dict) -> int:
+    """Minimum minutes between two posts of an account."""
+    return max(int(account.get("min_gap", SLOT_MIN_GAP_MINUTES)), 1)
+
+
+def plan_slots(
+    accounts: list[dict],
+    days: int = SLOT_HORIZON_DAYS,
+    now: datetime | None = None,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """Return a ``SLOT_DTYPE`` array of future posting slots sorted by time.
+
+    Day 0 is the current local day of each account, so the horizon covers the
+    rest of today plus ``days - 1`` full days. Slots for the same account are
+    at least ``min_gap`` minutes apart, also across midnight.
+    """
+    if not accounts or days <= 0:
+        return np.empty(0, SLOT_DTYPE)
+    rng = rng or np.random.default_rng()
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.astimezone()
+    default_quiet = _parse_ranges(SLOT_QUIET_HOURS)
+
+    n_acc = len(accounts)
+    cap = np.array([daily_cap(a) for a in accounts], dtype=np.int64)
+    gap = np.array([min_gap(a) for a in accounts], dtype=np.int64)
+    allowed = _window(
+        [a.get("start_hour", SLOT_START_HOUR) for a in accounts],
+        [a.get("end_hour", SLOT_END_HOUR) for a in accounts],
+    )
+    for i, account in enumerate(accounts):
+        for start, end in account.get("quiet_hours", default_quiet):
+            allowed[i] &= ~_window(start, end)
+
+    # Local midnights (as UTC epochs) for days 0..days of every account.
+    zones = [_zone(a.get("tz", SLOT_TZ)) for a in accounts]
+    dates = [[now.astimezone(z).date() + timedelta(days=d) for d in range(days + 1)] for z in zones]
+    midnights = np.array(
+        [[datetime.combine(day, time(), z).timestamp() for day in row] for z, row in zip(zones, dates)],
+        dtype=np.int64,
+    )
+
+    # One row per (account, day).
+    acc = np.repeat(np.arange(n_acc), days)
+    day = np.tile(np.arange(days), n_acc)
+    mask = allowed[acc]
+    # Minutes index wall-clock time, which on a DST day is not the real
+    # time since midnight.
+    local_now = [now.astimezone(z) for z in zones]
+    elapsed = np.array([t.hour * 60 + t.minute + 1 for t in local_now], dtype=np.int64)
+    mask[day == 0] &= _MINUTES >= elapsed[acc[day == 0], None]
+
+    n = mask.sum(axis=1)
+    g = gap[acc]
+    k = np.minimum(cap[acc], (n - 1) // g + 1).clip(min=0)
+    width = int(k.max()) if len(k) else 0
+    if width == 0:
+        return np.empty(0, SLOT_DTYPE)
+    cols = np.arange(width)
+    valid = cols < k[:, None]
+
+    # k sorted draws in [0, n - (k-1)*gap), then spread by gap: the largest
+    # lands on n-1 at most and consecutive draws are >= gap apart.
+    span = np.maximum(n - (k - 1) * g, 1)
+    draws = np.floor(rng.random((len(k), width)) * span[:, None]).astype(np.int64)
+    draws = np.sort(np.where(valid, draws, np.iinfo(np.int64).max), axis=1)
+    draws = np.where(valid, draws + cols * g[:, None], 0)
+
+    # Position i in a row's allowed minutes -> minute of the day.
+    order = np.argsort(~mask, axis=1, kind="stable")
+    minute = np.take_along_axis(order, draws, axis=1)
+    when = midnights[acc, day][:, None] + minute * 60
+
+    rows, slot_cols = np.nonzero(valid)
+    when = when[rows, slot_cols]
+    slot_acc = acc[rows]
+
+    # Days with a DST change are not 24h long; redo those few in zoneinfo.
+    day_len = midnights[:, 1:] - midnights[:, :-1]
+    for r in np.nonzero(day_len[acc, day][rows] != 86400)[0]:
+        a, d = slot_acc[r], day[rows[r]]
+        local = datetime.combine(dates[a][d], time(), zones[a]) + timedelta(minutes=int(minute[rows[r], slot_cols[r]]))
+        when[r] = int(local.timestamp())
+
+    # A wall-clock minute in the hour repeated when DST ends resolves to its
+    # first occurrence, which can already be past.
+    future = when > int(now.timestamp())
+    plan = np.empty(int(future.sum()), SLOT_DTYPE)
+    plan["account"] = slot_acc[future]
+    plan["when"] = when[future].astype("datetime64[s]")
+    plan = plan[np.lexsort((plan["when"], plan["account"]))]
+
+    # Windows that wrap midnight can put the first slot of a day too close
+    # to the last one of the previous day; drop the later slot.
+    if len(plan) > 1:
+        same = plan["account"][1:] == plan["account"][:-1]
+        close = (plan["when"][1:] - plan["when"][:-1]).astype(np.int64) < gap[plan["account"][1:]] * 60
+        plan = plan[np.concatenate(([True], ~(same & close)))]
+    return plan[np.argsort(plan["when"], kind="stable")]
+
+
+def slot_datetime(when: np.datetime64) -> datetime:
+    """Convert a slot's ``when`` to an aware UTC datetime."""
+    return datetime.fromtimestamp(int(when.astype("datetime64[s]").astype(np.int64)), timezone.utc)
@@ -0,0 +1,192 @@
+"""Cached topic list with weighted, no-repeat sampling.
+
+Each line of a topic file is one topic. A line may end with ``| <weight>`` to
+make it more (or less) likely to be picked, e.g.::
+
+    StyleSync AI outfit sharing feature | 3
+
+The file is parsed once and only re-read when its mtime or size changes.
+Picks use Vose's alias method so sampling is O(1) regardless of file size,
+and the last ``TOPIC_HISTORY_SIZE`` published topics are kept in a SQLite
+table next to the topic file so a topic is not repeated within that many
+posts, across runs. Each record is its own insert and every pick re-reads the
+table, so posting workers running in parallel processes see each other's
+topics instead of overwriting them. Callers that pick a topic ahead of publishing (the content backlog)
+sample with ``record=False`` and call ``record_topic`` once the post is out.
+"""
+import os
+import random
+import sqlite3
+import threading
+from collections.abc import Iterable
+
+TOPIC_HISTORY_SIZE = int(os.getenv("TOPIC_HISTORY_SIZE", "10"))
+
+
+def _parse_line(line: str) -> tuple[str, float] | None:
+    line = line.strip()
+    if not line:
+        return None
+    text, sep, weight = line.rpartition("|")
+    if sep:
+        try:
+            value = float(weight)
+        except ValueError:
+            return line, 1.0
+        text = text.strip()
+        if text and value > 0:
+            return text, value
+        return None
+    return line, 1.0
+
+
+def _build_alias(weights: list[float]) -> tuple[list[float], list[int]]:
+    """Return (probability, alias) tables for Vose's alias method."""
+    n = len(weights)
+    total = sum(weights)
+    prob = [w * n / total for w in weights]
+    alias = list(range(n))
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        g = large.pop()
+        alias[s] = g
+        prob[g] = prob[g] + prob[s] - 1.0
+        (small if prob[g] < 1.0 else large).append(g)
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class TopicStore:
+    """Topics parsed from one file, reloaded when the file changes."""
+
+    def __init__(self, path: str, history_size: int = TOPIC_HISTORY_SIZE, history_path: str | None = None):
+        self.path = path
+        self.history_path = history_path or f"{path}.history.sqlite3"
+        self.history_size = max(history_size, 0)
+        self.topics: list[str] = []
+        self._prob: list[float] = []
+        self._alias: list[int] = []
+        self._distinct = 0
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.history_path, timeout=30)
+        db.execute("CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL)")
+        return db
+
+    def recent(self) -> list[str]:
+        """Return the recently published topics, oldest first."""
+        if not self.history_size:
+            return []
+        try:
+            db = self._connect()
+            try:
+                rows = db.execute(
+                    "SELECT topic FROM history ORDER BY id DESC LIMIT ?", (self.history_size,)
+                ).fetchall()
+            finally:
+                db.close()
+        except sqlite3.Error as exc:
+            print("Topic history unavailable:", exc)
+            return []
+        return [topic for topic, in reversed(rows)]
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.topics, self._prob, self._alias = [], [], []
+            self._distinct = 0
+            self._signature = None
+            return
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return
+        with open(self.path, "r") as f:
+            parsed = [entry for entry in map(_parse_line, f) if entry]
+        self.topics = [text for text, _ in parsed]
+        self._distinct = len(set(self.topics))
+        if parsed:
+            self._prob, self._alias = _build_alias([weight for _, weight in parsed])
+        else:
+            self._prob, self._alias = [], []
+        self._signature = signature
+
+    def _draw(self) -> str:
+        i = random.randrange(len(self.topics))
+        if random.random() >= self._prob[i]:
+            i = self._alias[i]
+        return self.topics[i]
+
+    def sample(self, default: str, record: bool = True, avoid: Iterable[str] = ()) -> str:
+        """Return a weighted random topic not used in the recent history.
+
+        ``avoid`` adds topics that were picked but not published yet. With
+        ``record=False`` the pick is not added to the history.
+        """
+        with self._lock:
+            self._refresh()
+            if not self.topics:
+                return default
+            # With fewer distinct topics than the history window, let the
+            # oldest picks back in so there is always something to choose.
+            picks = self.recent() + list(avoid)
+            window = min(len(picks), self._distinct - 1)
+            recent = set(picks[len(picks) - window:]) if window > 0 else set()
+            topic = self._draw()
+            for _ in range(100):
+                if topic not in recent:
+                    break
+                topic = self._draw()
+            else:
+                topic = random.choice([t for t in self.topics if t not in recent] or self.topics)
+            if record:
+                self._record(topic)
+            return topic
+
+    def _record(self, topic: str):
+        if not self.history_size:
+            return
+        try:
+            db = self._connect()
+            try:
+                with db:
+                    row_id = db.execute("INSERT INTO history (topic) VALUES (?)", (topic,)).lastrowid
+                    db.execute("DELETE FROM history WHERE id <= ?", (row_id - self.history_size,))
+            finally:
+                db.close()
+        except sqlite3.Error as exc:
+            print("Failed to save topic history:", exc)
+
+    def record(self, topic: str):
+        """Add a published topic to the no-repeat history."""
+        with self._lock:
+            self._record(topic)
+
+
+_stores: dict[str, TopicStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_topic_store(path: str) -> TopicStore:
+    """Return the shared TopicStore for path."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = TopicStore(path)
+        return store
+
+
+def random_topic(path: str, default: str, record: bool = True) -> str:
+    """Shortcut for ``get_topic_store(path).sample(default, record)``."""
+    return get_topic_store(path).sample(default, record)
+
+
+def record_topic(path: str, topic: str):
+    """Shortcut for ``get_topic_store(path).record(topic)``."""
+    get_topic_store(path).record(topic)
@@ -1,16 +1,16 @@
 import os
-import random
+import sys
 from datetime import datetime
 
-import tweepy
-from openai import OpenAI
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from src.llm_cache import cached_completion
+from src.rate_limit import rate_limited
+from src.topic_store import random_topic, record_topic
+from src.utils import get_openai_client
 
 TOPIC_FILE = os.getenv("TOPIC_FILE", "topics.txt")
 STYLE_STATE_FILE = os.getenv("STYLE_STATE_FILE", "tweet_style.txt")
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
 """Utility for generating and posting a single text tweet each day.
 
 The core authentication mirrors the following minimal Tweepy example:
@@ -33,26 +33,20 @@ automated workflow without hard coded secrets.
 """
 
 
-def _create_twitter_client() -> tweepy.Client:
-    """Return an authenticated Tweepy Client using env vars."""
-    return tweepy.Client(
+def _create_twitter_client():
+    """Return an authenticated, rate-limited Tweepy Client using env vars."""
+    import tweepy
+
+    return rate_limited(tweepy.Client(
         consumer_key=os.getenv("TWITTER_API_KEY"),
         consumer_secret=os.getenv("TWITTER_API_SECRET"),
         access_token=os.getenv("TWITTER_ACCESS_TOKEN"),
         access_token_secret=os.getenv("TWITTER_ACCESS_SECRET"),
-    )
-
-
-def _load_topics():
-    if not os.path.exists(TOPIC_FILE):
-        return ["our product"]
-    with open(TOPIC_FILE, "r") as f:
-        topics = [line.strip() for line in f if line.strip()]
-    return topics or ["our product"]
+    ))
 
 
 def _get_random_topic():
-    return random.choice(_load_topics())
+    return random_topic(TOPIC_FILE, "our product", record=False)
 
 
 def _next_style() -> str:
@@ -72,27 +66,37 @@ def generate_tweet(topic: str, style: str) -> str:
         f"Write a short {style} tweet about {topic}. "
         "Add a couple popular hashtags relevant to the topic."
     )
-    res = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return res.choices[0].message.content.strip()
 
+    def _generate() -> str:
+        res = get_openai_client().chat.completions.create(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return res.choices[0].message.content.strip()
+
+    return cached_completion("post", "gpt-4o", prompt, _generate)
+
+
+def post_tweet(text: str) -> bool:
+    """Post a text-only tweet using the v2 API; returns True once it is published."""
+    import tweepy
 
-def post_tweet(text: str):
-    """Post a text-only tweet using the v2 API."""
     client = _create_twitter_client()
     try:
         client.create_tweet(text=text)
+        return True
     except tweepy.errors.TweepyException as exc:
         print(f"Failed to post tweet: {exc}")
+        return False
 
 
 def main():
     style = _next_style()
     topic = _get_random_topic()
     tweet = generate_tweet(topic, style)
-    post_tweet(tweet)
+    if not post_tweet(tweet):
+        return
+    record_topic(TOPIC_FILE, topic)
     print(f"[{datetime.now().isoformat()}] Tweeted with style {style} about '{topic}'")
 
 
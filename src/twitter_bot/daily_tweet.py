@@ -1,47 +1,47 @@
 import os
 import random
+import sys
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
+from typing import BinaryIO
 
-import requests
-import tweepy
-from openai import OpenAI
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from src.content_queue import ClaimedPost
+from src.llm_cache import cached_completion
+from src.media import download_media
+from src.rate_limit import rate_limited
+from src.topic_store import random_topic, record_topic
+from src.utils import get_openai_client
 
 # Setup
 TOPIC_FILE = os.getenv("TOPIC_FILE", "topics.txt")
 IMAGE_DIR = os.getenv("IMAGE_DIR", "images")
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 # Twitter Auth
-def _create_twitter_clients() -> tuple[tweepy.API, tweepy.Client]:
+@lru_cache(maxsize=None)
+def _create_twitter_clients():
+    import tweepy
+
     auth = tweepy.OAuth1UserHandler(
         os.getenv("TWITTER_API_KEY"),
         os.getenv("TWITTER_API_SECRET"),
         os.getenv("TWITTER_ACCESS_TOKEN"),
         os.getenv("TWITTER_ACCESS_SECRET"),
     )
-    api_v1 = tweepy.API(auth)
-    client_v2 = tweepy.Client(
+    api_v1 = rate_limited(tweepy.API(auth))
+    client_v2 = rate_limited(tweepy.Client(
         bearer_token=os.getenv("TWITTER_BEARER_TOKEN"),
         consumer_key=os.getenv("TWITTER_API_KEY"),
         consumer_secret=os.getenv("TWITTER_API_SECRET"),
         access_token=os.getenv("TWITTER_ACCESS_TOKEN"),
         access_token_secret=os.getenv("TWITTER_ACCESS_SECRET"),
-    )
+    ))
     return api_v1, client_v2
 
-twitter_api_v1, twitter_client_v2 = _create_twitter_clients()
-
 # Topic & Style
-def _load_topics():
-    if not os.path.exists(TOPIC_FILE):
-        return ["our product"]
-    with open(TOPIC_FILE, "r") as f:
-        return [line.strip() for line in f if line.strip()]
-
 def _get_random_topic():
-    return random.choice(_load_topics())
+    return random_topic(TOPIC_FILE, "our product", record=False)
 
 def _random_style():
     return random.choice(["funny", "serious"])
@@ -54,11 +54,15 @@ def generate_tweet(topic: str, style: str) -> str:
     )
     for i in range(3):  # Retry in case of API hiccups
         try:
-            res = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
+            tweet = cached_completion(
+                "post",
+                "gpt-4o",
+                prompt,
+                lambda: get_openai_client().chat.completions.create(
+                    model="gpt-4o",
+                    messages=[{"role": "user", "content": prompt}],
+                ).choices[0].message.content.strip(),
             )
-            tweet = res.choices[0].message.content.strip()
             print(f"✅ Generated tweet (attempt {i+1}): {tweet}")
             return tweet
         except Exception as e:
@@ -69,7 +73,7 @@ def generate_tweet(topic: str, style: str) -> str:
 def generate_image_from_tweet(tweet: str) -> str | None:
     try:
         print("🖼️ Requesting image generation based on tweet text...")
-        res = client.images.generate(
+        res = get_openai_client().images.generate(
             model="dall-e-3",
             prompt=f"Create an engaging image to visually represent this tweet: \"{tweet}\". It should match the theme and include visual metaphor where appropriate. If the tweet is funny make it a meme.",
             size="1024x1024",
@@ -84,26 +88,27 @@ def generate_image_from_tweet(tweet: str) -> str | None:
         return None
 
 # Download image
-def download_image(url: str) -> str | None:
+def download_image(url: str) -> BinaryIO | None:
+    """Stream the image into a memory-backed buffer (spills to a temp file if large)."""
     try:
-        r = requests.get(url)
-        path = os.path.join(IMAGE_DIR, "tweet_temp.jpg")
-        os.makedirs(IMAGE_DIR, exist_ok=True)
-        with open(path, "wb") as f:
-            f.write(r.content)
-        print(f"✅ Image saved to {path}")
-        return path
+        image = download_media(url)
+        print("✅ Image downloaded")
+        return image
     except Exception as e:
         print(f"❌ Failed to download image: {e}")
         return None
 
 # Post Tweet
-def post_tweet(text: str, image_path: str | None = None):
+def post_tweet(text: str, image: BinaryIO | None = None) -> bool:
+    """Post the tweet; returns True once it is published."""
+    import tweepy
+
+    twitter_api_v1, twitter_client_v2 = _create_twitter_clients()
     media_ids = []
-    if image_path and os.path.exists(image_path):
+    if image is not None:
         try:
-            print(f"📤 Uploading image via v1.1: {image_path}")
-            media = twitter_api_v1.media_upload(image_path)
+            print("📤 Uploading image via v1.1")
+            media = twitter_api_v1.media_upload("tweet_image.png", file=image)
             media_ids = [media.media_id]
         except Exception as e:
             print(f"❌ Failed to upload media: {e}")
@@ -114,19 +119,31 @@ def post_tweet(text: str, image_path: str | None = None):
             media_ids=media_ids if media_ids else None
         )
         print("✅ Tweet posted successfully!")
+        return True
     except tweepy.TweepyException as e:
         print(f"❌ Failed to post tweet: {e}")
+        return False
 
 # Main Bot
 def main():
-    style = _random_style()
-    topic = _get_random_topic()
-    tweet = generate_tweet(topic, style)
-    image_url = generate_image_from_tweet(tweet)
-    image_path = download_image(image_url) if image_url else None
-    post_tweet(tweet, image_path)
-    if image_path and os.path.exists(image_path):
-        os.remove(image_path)
+    with ClaimedPost("twitter") as claim:
+        if claim.post:
+            style, topic, tweet = claim.post["style"], claim.post["topic"], claim.post["text"]
+            print(f"📦 Using queued twitter post: {tweet}")
+        else:
+            style = _random_style()
+            topic = _get_random_topic()
+            tweet = generate_tweet(topic, style)
+        image_url = generate_image_from_tweet(tweet)
+        image = download_image(image_url) if image_url else None
+        try:
+            claim.published = post_tweet(tweet, image)
+        finally:
+            if image is not None:
+                image.close()
+    if not claim.published:
+        return
+    record_topic(TOPIC_FILE, topic)
     print(f"[{datetime.now().isoformat()}] Tweeted with style {style} about '{topic}'")
 
 if __name__ == "__main__":
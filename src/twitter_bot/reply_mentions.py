@@ -1,39 +1,174 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-import requests
-import tweepy
-import openai
+import json
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+from src.rate_limit import quota, rate_limited
+from src.reply_clusters import ReplyClusterer, vary_reply
 from src.utils import is_spam, generate_context_reply
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+SINCE_ID_FILE = os.getenv("SINCE_ID_FILE", "since_id.txt")
+# Progress through a since_id/max_id window that has not been fully replied to.
+MENTION_WINDOW_FILE = os.getenv("MENTION_WINDOW_FILE", "mention_window.json")
+# Mentions requested per mentions_timeline call (API maximum is 200).
+MENTION_PAGE_SIZE = int(os.getenv("MENTION_PAGE_SIZE", "200"))
+# Pages read per run (0 = until caught up); the rest resumes on the next run.
+MENTION_MAX_PAGES = int(os.getenv("MENTION_MAX_PAGES", "0"))
+# Without a since_id file only this many of the latest mentions are answered;
+# older history is skipped instead of being replied to.
+MENTION_BOOTSTRAP_COUNT = int(os.getenv("MENTION_BOOTSTRAP_COUNT", "20"))
+# Replies generated in parallel; posting stays in mention order.
+REPLY_WORKERS = int(os.getenv("REPLY_WORKERS", "4"))
+# Tweet length limit; the "@handle " prefix counts towards it.
+TWEET_LIMIT = 280
+# Minimum seconds between two posted replies.
+REPLY_INTERVAL = float(os.getenv("REPLY_INTERVAL", "2"))
 
-auth = tweepy.OAuth1UserHandler(
-    os.getenv("TWITTER_API_KEY"),
-    os.getenv("TWITTER_API_SECRET"),
-    os.getenv("TWITTER_ACCESS_TOKEN"),
-    os.getenv("TWITTER_ACCESS_SECRET")
-)
-api = tweepy.API(auth)
+@lru_cache(maxsize=None)
+def get_api():
+    """Return the rate-limited tweepy API client, created on first use."""
+    import tweepy
 
-def get_mentions(since_id):
-    try:
-        return api.mentions_timeline(since_id=since_id, tweet_mode='extended')
-    except tweepy.TweepyException as e:
-        print(f"❌ Error fetching mentions: {e}")
-        return []
+    auth = tweepy.OAuth1UserHandler(
+        os.getenv("TWITTER_API_KEY"),
+        os.getenv("TWITTER_API_SECRET"),
+        os.getenv("TWITTER_ACCESS_TOKEN"),
+        os.getenv("TWITTER_ACCESS_SECRET")
+    )
+    return rate_limited(tweepy.API(auth))
+
+def get_mentions(since_id, max_id=None, count=MENTION_PAGE_SIZE):
+    """Return one page of mentions newer than since_id, newest first."""
+    return get_api().mentions_timeline(
+        since_id=since_id, max_id=max_id, count=count, tweet_mode='extended'
+    )
+
+class MentionStream:
+    """Lazily page backwards through mentions between since_id and max_id.
+
+    Only one page is held in memory at a time. ``exhausted`` becomes True once
+    the window has been read down to since_id; it stays False if the stream
+    stopped early because of ``max_pages``.
+    """
+
+    def __init__(self, since_id, max_id=None, page_size=MENTION_PAGE_SIZE, max_pages=MENTION_MAX_PAGES):
+        self.since_id = since_id
+        self.max_id = max_id
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.exhausted = False
+
+    def __iter__(self):
+        max_id = self.max_id
+        pages = 0
+        while not self.max_pages or pages < self.max_pages:
+            page = get_mentions(self.since_id, max_id, self.page_size)
+            pages += 1
+            if not page:
+                self.exhausted = True
+                return
+            print(f"📥 Fetched page {pages} with {len(page)} mentions")
+            yield from page
+            max_id = page[-1].id - 1
 
 def generate_reply(text: str) -> str:
     return generate_context_reply(text)
 
-def reply_to_mentions():
-    # ✅ Safe load of since_id
+def load_since_id() -> int | None:
+    """Return the saved since_id, or None on a first run."""
+    try:
+        with open(SINCE_ID_FILE, "r") as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+def save_since_id(since_id: int):
+    """Atomically persist since_id so a crash never leaves a partial file."""
+    tmp = f"{SINCE_ID_FILE}.tmp"
+    with open(tmp, "w") as f:
+        f.write(str(since_id))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, SINCE_ID_FILE)
+
+def load_window() -> dict | None:
     try:
-        with open("since_id.txt", "r") as f:
-            since_id = int(f.read().strip())
+        with open(MENTION_WINDOW_FILE, "r") as f:
+            return json.load(f)
     except (FileNotFoundError, ValueError):
-        since_id = 1
+        return None
+
+def save_window(window: dict):
+    tmp = f"{MENTION_WINDOW_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(window, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, MENTION_WINDOW_FILE)
+
+def generate_replies(mentions, workers: int = REPLY_WORKERS):
+    """Yield (mention, future, position) triples in input order.
 
+    Reply generation runs on a bounded pool and stays at most ``2 * workers``
+    mentions ahead of the consumer. Near-duplicate questions share the future
+    of the first one in their cluster; position counts earlier members so the
+    shared reply can be varied. Spam mentions are yielded with ``None``.
+    """
+    clusterer = ReplyClusterer()
+    shared: dict[int, Future] = {}
+    members: dict[int, int] = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        pending: deque[tuple[object, Future | None, int]] = deque()
+        for mention in mentions:
+            if is_spam(mention.full_text):
+                pending.append((mention, None, 0))
+            else:
+                cid = clusterer.add(mention.full_text)
+                if cid not in shared:
+                    shared[cid] = pool.submit(generate_reply, mention.full_text)
+                position = members.get(cid, 0)
+                members[cid] = position + 1
+                pending.append((mention, shared[cid], position))
+            if len(pending) > 2 * workers:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+def _is_permanent(error) -> bool:
+    """True for client errors that retrying will not fix, e.g. a deleted tweet.
+
+    Rate limits, server errors, network failures and the scheduler's own
+    "resets in" errors are transient.
+    """
+    import tweepy
+
+    return (
+        isinstance(error, tweepy.HTTPException)
+        and not isinstance(error, (tweepy.TooManyRequests, tweepy.TwitterServerError))
+    )
+
+def reply_to_mentions():
+    """Reply to every mention since the last run, newest first.
+
+    Mentions are streamed page by page. After each one that is replied to or
+    deliberately skipped, the remaining window (since_id, max_id and the
+    newest id seen) is checkpointed, so a crash or a MENTION_MAX_PAGES cut-off
+    resumes exactly where it stopped. A failed generation or a transient
+    posting error (rate limit, server or network error) stops the run without
+    checkpointing, so the next run retries that mention. since_id.txt only
+    moves forward once the whole window has been handled.
+
+    Without since_id.txt (a first run, or CI without persisted state) only
+    the latest MENTION_BOOTSTRAP_COUNT mentions are read, and the newest of
+    them becomes the since_id.
+    """
+    import tweepy
+
+    api = get_api()
     # ✅ Check auth explicitly
     try:
         user = api.verify_credentials()
@@ -42,30 +177,79 @@ def reply_to_mentions():
         print(f"❌ Failed to authenticate: {e}")
         return
 
-    mentions = get_mentions(since_id)
-    print(f"📥 Found {len(mentions)} mentions")
-
-    for mention in reversed(mentions):
-        if is_spam(mention.full_text):
-            print(f"🚫 Skipping spam from @{mention.user.screen_name}")
-            continue
-
-        print(f"💬 Replying to @{mention.user.screen_name}: {mention.full_text}")
-        reply_text = generate_reply(mention.full_text)
-        try:
-            api.update_status(
-                status=f"@{mention.user.screen_name} {reply_text}",
-                in_reply_to_status_id=mention.id
-            )
-            print(f"✅ Replied to @{mention.user.screen_name}")
-        except tweepy.TweepyException as e:
-            print(f"❌ Failed to reply: {e}")
-
-        since_id = max(since_id, mention.id)
-
-    # ✅ Always write latest since_id
-    with open("since_id.txt", "w") as f:
-        f.write(str(since_id))
+    # ✅ Resume an unfinished window, otherwise start from since_id
+    window = load_window()
+    if window:
+        print(f"↩️ Resuming mentions below id {window['max_id']}")
+    else:
+        since_id = load_since_id()
+        window = {"since_id": since_id or 1, "max_id": None, "newest_id": None, "bootstrap": since_id is None}
+
+    if window.get("bootstrap"):
+        print(f"🆕 No {SINCE_ID_FILE}; answering only the latest {MENTION_BOOTSTRAP_COUNT} mentions")
+        stream = MentionStream(window["since_id"], window["max_id"], page_size=MENTION_BOOTSTRAP_COUNT, max_pages=1)
+    else:
+        stream = MentionStream(window["since_id"], window["max_id"])
+    handled = 0
+    last_post = 0.0
+    stopped = False
+    try:
+        for mention, future, position in generate_replies(stream):
+            if future is None:
+                print(f"🚫 Skipping spam from @{mention.user.screen_name}")
+            else:
+                print(f"💬 Replying to @{mention.user.screen_name}: {mention.full_text}")
+                try:
+                    reply_text = future.result()
+                except Exception as e:
+                    print(f"❌ Failed to generate reply: {e}")
+                    reply_text = None
+                if not reply_text:
+                    # Leave the window here so the next run retries this mention.
+                    print("⏸️ Stopping; this mention is retried on the next run")
+                    stopped = True
+                    break
+                limit = TWEET_LIMIT - len(mention.user.screen_name) - 2
+                reply_text = vary_reply(reply_text, position, limit)
+                wait = REPLY_INTERVAL - (time.monotonic() - last_post)
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    api.update_status(
+                        status=f"@{mention.user.screen_name} {reply_text}",
+                        in_reply_to_status_id=mention.id
+                    )
+                    print(f"✅ Replied to @{mention.user.screen_name}")
+                except tweepy.TweepyException as e:
+                    print(f"❌ Failed to reply: {e}")
+                    if not _is_permanent(e):
+                        print("⏸️ Stopping; this mention is retried on the next run")
+                        stopped = True
+                        break
+                    # The tweet cannot be replied to (deleted, protected, duplicate).
+                    print(f"🚫 Skipping mention {mention.id}")
+                finally:
+                    last_post = time.monotonic()
+
+            # ✅ Checkpoint after every handled mention so a crash resumes from here
+            handled += 1
+            window["newest_id"] = max(window["newest_id"] or 0, mention.id)
+            window["max_id"] = mention.id - 1
+            save_window(window)
+    except tweepy.TweepyException as e:
+        print(f"❌ Error fetching mentions: {e}")
+        stopped = True
+
+    print(f"📥 Handled {handled} mentions")
+    print(f"📊 Rate limits: {quota()}")
+    if stopped:
+        return
+    # A bootstrap window ends after its single page; older mentions are skipped.
+    if stream.exhausted or (window.get("bootstrap") and handled):
+        if window["newest_id"]:
+            save_since_id(max(window["since_id"], window["newest_id"]))
+        if os.path.exists(MENTION_WINDOW_FILE):
+            os.remove(MENTION_WINDOW_FILE)
 
 if __name__ == "__main__":
     reply_to_mentions()
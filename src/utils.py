@@ -1,23 +1,156 @@
 import re
-import openai
 import os
-from typing import Optional
+import sys
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.llm_cache import cached_completion
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
 FAQ_LINK = os.getenv("FAQ_LINK", "https://example.com/faq")
 
+def get_openai():
+    """Return the ``openai`` module, importing it on first use.
+
+    Importing openai takes most of a bot's start-up time, so modules only pay
+    for it when they actually call the API.
+    """
+    import openai
+
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+
+@lru_cache(maxsize=None)
+def get_openai_client():
+    """Return a shared ``openai.OpenAI`` client, created on first use."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
 EMOJI_PATTERN = re.compile(r"^[\W_]+$")
 
+SPAM_KEYWORDS_FILE = os.getenv(
+    "SPAM_KEYWORDS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "spam_keywords.txt"),
+)
+DEFAULT_SPAM_KEYWORDS = ["buy followers", "check my page", "subscribe"]
+
+# Leetspeak digits/symbols and common Cyrillic/Greek look-alikes mapped to the
+# Latin letters they imitate, applied after NFKC folding.
+_CONFUSABLES = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s", "!": "i",
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+    "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ј": "j", "ѕ": "s", "ԁ": "d",
+    "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p",
+    "τ": "t", "υ": "u", "χ": "x",
+})
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_for_spam(text: str) -> str:
+    """Fold case, accents, Unicode look-alikes and leetspeak for keyword matching."""
+    if text.isascii():
+        text = text.lower()
+    else:
+        text = unicodedata.normalize("NFKD", unicodedata.normalize("NFKC", text).casefold())
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(" ", text.translate(_CONFUSABLES))
+
+
+def _trie_pattern(words: list[str]) -> str:
+    """Return a regex alternation of words factored by common prefix.
+
+    Python's ``re`` tries alternatives one by one, so a flat ``a|b|c`` over
+    thousands of keywords is slow; a prefix trie keeps each step to a single
+    character class lookup.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if end else body
+
+    return build(trie)
+
+
+class SpamMatcher:
+    """Single compiled matcher over a keyword file, rebuilt when the file changes."""
+
+    def __init__(self, path: str = SPAM_KEYWORDS_FILE):
+        self.path = path
+        self.keywords: list[str] = []
+        self.pattern: re.Pattern | None = None
+        self._signature = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> list[str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = [line.strip() for line in f]
+        except FileNotFoundError:
+            return DEFAULT_SPAM_KEYWORDS
+        return [line for line in lines if line and not line.startswith("#")]
+
+    def refresh(self):
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            keywords = sorted({normalize_for_spam(kw).strip() for kw in self._load()} - {""})
+            self.pattern = re.compile(_trie_pattern(keywords)) if keywords else None
+            self.keywords = keywords
+            self._signature = signature
+
+    def search(self, normalized: str) -> bool:
+        return self.pattern is not None and self.pattern.search(normalized) is not None
+
+
+_spam_matcher = SpamMatcher()
+
+
+def classify_spam(texts: Iterable[str], matcher: SpamMatcher | None = None) -> list[bool]:
+    """Return one spam verdict per text; accepts any iterable of strings.
+
+    The keyword file is checked for changes once per call, so filtering a
+    burst of comments in one batch costs a single stat plus one regex scan
+    per message.
+    """
+    matcher = matcher or _spam_matcher
+    matcher.refresh()
+    results = []
+    for text in texts:
+        stripped = text.strip() if text else ""
+        if len(stripped) < 4 or EMOJI_PATTERN.fullmatch(stripped):
+            results.append(True)
+        else:
+            results.append(matcher.search(normalize_for_spam(text)))
+    return results
+
 
 def is_spam(text: str) -> bool:
     """Return True if text looks like spam or too short."""
-    if not text or len(text.strip()) < 4:
-        return True
-    if EMOJI_PATTERN.fullmatch(text.strip()):
-        return True
-    spam_keywords = ["buy followers", "check my page", "subscribe"]
-    lowered = text.lower()
-    return any(kw in lowered for kw in spam_keywords)
+    return classify_spam([text])[0]
 
 
 def generate_context_reply(text: str) -> str:
@@ -27,8 +160,12 @@ def generate_context_reply(text: str) -> str:
         f"Answer the user question briefly and include a CTA to read the FAQ here: {FAQ_LINK}. "
         f"Question: {text}"
     )
-    res = openai.ChatCompletion.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return res["choices"][0]["message"]["content"].strip()
+
+    def _generate() -> str:
+        res = get_openai().ChatCompletion.create(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return res["choices"][0]["message"]["content"].strip()
+
+    return cached_completion("reply", "gpt-4o", prompt, _generate)
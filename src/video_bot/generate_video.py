@@ -1,18 +1,17 @@
 
-import openai
-import subprocess
 import os
-import random
-from gtts import gTTS
+import sys
 from datetime import datetime
 
-# Environment variable for OpenAI API
-openai.api_key = os.getenv("OPENAI_API_KEY")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from src.image_catalog import get_image_catalog
+from src.utils import get_openai
+
 IMAGE_DIR = os.getenv("IMAGE_DIR", "images")
 
 def generate_script():
     prompt = "Write a short 15-second video script promoting a free AI recipe app that generates meal ideas based on fridge photos. Make it friendly, use emojis, and end with a call to action."
-    response = openai.ChatCompletion.create(
+    response = get_openai().ChatCompletion.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}]
     )
@@ -20,50 +19,89 @@ def generate_script():
 
 
 def get_random_background() -> str:
-    if not os.path.isdir(IMAGE_DIR):
+    """Return a cached 720x1280 background made from a random seed image."""
+    catalog = get_image_catalog(IMAGE_DIR)
+    image = catalog.random_image()
+    if not image:
         return "background.jpg"
-    imgs = [os.path.join(IMAGE_DIR, f) for f in os.listdir(IMAGE_DIR) if f.lower().endswith((".png", ".jpg", ".jpeg"))]
-    return random.choice(imgs) if imgs else "background.jpg"
+    try:
+        return catalog.video_background(image)
+    except Exception as exc:
+        print(f"⚠️ Could not prepare background from {image}: {exc}")
+        return image
+
+def save_text_as_audio(text, audio_path="voiceover.aac"):
+    """Write the voiceover as AAC and return (sentence, seconds) per sentence."""
+    from src.video_bot.tts import synthesize
+
+    return synthesize(text, audio_path)
 
-def save_text_as_audio(text, audio_path="voiceover.mp3"):
-    tts = gTTS(text)
-    tts.save(audio_path)
-    print("🔊 Audio saved with gTTS.")
+def _srt_time(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
 
-def save_subtitles(text, srt_path="captions.srt"):
-    lines = text.split(". ")
+def save_subtitles(text, srt_path="captions.srt", segments=None):
+    """Write captions; with TTS segments each sentence is shown while it is spoken."""
     with open(srt_path, "w") as f:
-        for i, line in enumerate(lines):
-            start = f"00:00:{i*2:02},000"
-            end = f"00:00:{(i+1)*2:02},000"
-            f.write(f"{i+1}\n{start} --> {end}\n{line.strip()}\n\n")
-    print("📝 Captions saved to captions.srt")
-
-def generate_video(script_text, image_path="background.jpg", output_path="output_reel.mp4"):
-    save_subtitles(script_text)
-
-    command = [
-        "ffmpeg",
-        "-loop", "1",
-        "-i", image_path,
-        "-i", "voiceover.mp3",
-        "-vf", "scale=720:1280,subtitles=captions.srt",
-        "-shortest",
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", "23",
-        "-c:a", "aac",
-        "-b:a", "128k",
-        output_path
-    ]
-
-    subprocess.run(command)
-    print(f"✅ Video saved to {output_path}")
+        if segments:
+            start = 0.0
+            for i, (sentence, duration) in enumerate(segments):
+                f.write(f"{i+1}\n{_srt_time(start)} --> {_srt_time(start + duration)}\n{sentence}\n\n")
+                start += duration
+        else:
+            lines = text.split(". ")
+            for i, line in enumerate(lines):
+                start = f"00:00:{i*2:02},000"
+                end = f"00:00:{(i+1)*2:02},000"
+                f.write(f"{i+1}\n{start} --> {end}\n{line.strip()}\n\n")
+    print(f"📝 Captions saved to {srt_path}")
+
+def generate_video(script_text, image_path="background.jpg", output_path="output_reel.mp4", audio_path=None):
+    """Render one video in a private temp workspace and return the result dict.
+
+    Without audio_path the voiceover is synthesized per sentence (see
+    ``tts.py``) and the captions follow the spoken sentences.
+
+    Batches should go through ``render_queue.RenderQueue`` instead, which runs
+    the same render on a process pool.
+    """
+    from src.video_bot.render_queue import RenderJob, render_job
+
+    result = render_job(RenderJob(script_text, image_path, output_path, audio_path=audio_path))
+    if result["status"] == "ok":
+        print(f"✅ Video saved to {output_path}")
+    else:
+        print(f"❌ Video render {result['status']}: {result.get('error')}")
+    return result
+
+def export_video(
+    script_text,
+    image_path="background.jpg",
+    output_path="output_reel.mp4",
+    targets=("tiktok", "reels", "twitter", "instagram_feed"),
+    audio_path=None,
+):
+    """Render every target aspect ratio in one ffmpeg run.
+
+    Returns the render result; ``result["outputs"]`` maps each platform in
+    targets to its file, size and bitrate cap.
+    """
+    from src.video_bot.render_queue import RenderJob, render_job
+
+    result = render_job(RenderJob(script_text, image_path, output_path, audio_path=audio_path, targets=list(targets)))
+    if result["status"] == "ok":
+        for platform, output in result["outputs"].items():
+            print(f"✅ {platform}: {output['path']} ({output['width']}x{output['height']})")
+    else:
+        print(f"❌ Video export {result['status']}: {result.get('error')}")
+    return result
 
 if __name__ == "__main__":
     print("🎬 Generating AI-powered promo video...")
     script = generate_script()
     print("📜 Script:\n", script)
-    save_text_as_audio(script)
     bg = get_random_background()
     generate_video(script, image_path=bg)
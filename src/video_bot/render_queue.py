@@ -0,0 +1,438 @@
+"""Render videos in parallel, each job in its own temporary workspace.
+
+A ``RenderJob`` describes one video (script, background image, output path
+and optionally a ready-made voiceover). ``RenderQueue.submit`` hands it to a
+process pool sized to the CPU count (``RENDER_WORKERS``). The worker creates
+a temp directory for the captions, voiceover and partial output, runs ffmpeg
+with ``-progress`` and moves the finished file to ``output_path``, so any
+number of renders can share a checkout.
+
+The encode settings come from ``RENDER_PROFILES`` (``RENDER_PROFILE`` picks
+the default). Reels are a still image plus voiceover, so the ``reel`` and
+``still`` profiles feed the image at a low frame rate, use
+``-tune stillimage`` and a long GOP, and scale the background once instead of
+on every frame: seed images use the cached ``ImageCatalog.video_background``
+crop, any other image (e.g. a meme) is stretched into the job workspace the
+way the legacy ``scale`` filter does. ``legacy`` is the original full-rate
+command; ``tests/bench_render.py`` compares them.
+
+A job with ``targets`` is exported for several platforms in one ffmpeg run:
+the background is decoded and the captions burned in once, then ``split``
+feeds one fitted, padded encode per distinct size in ``EXPORT_TARGETS``
+(targets with the same size and bitrate share a file). The result's
+``outputs`` maps each platform to its file.
+
+An encode that runs longer than ``RENDER_TIMEOUT`` seconds is killed. Every
+job resolves to a result dict with ``status`` ("ok", "failed" or
+"timeout"), the ffmpeg error tail on failure and the final encode speed.
+Progress updates (output time, percent, speed) are kept in
+``RenderQueue.progress`` and passed to the optional ``on_progress`` callback.
+"""
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from src.image_catalog import get_image_catalog
+from src.video_bot.generate_video import save_subtitles, save_text_as_audio
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "600"))
+# Parent directory for job workspaces (defaults to the system temp dir).
+RENDER_WORK_DIR = os.getenv("RENDER_WORK_DIR") or None
+FFMPEG = os.getenv("FFMPEG", "ffmpeg")
+RENDER_PROFILE = os.getenv("RENDER_PROFILE", "reel")
+VIDEO_SIZE = (720, 1280)
+
+# fps: output frame rate (None keeps ffmpeg's 25 fps image default).
+# source_fps: rate at which the image is decoded and captions are drawn;
+#   frames are then duplicated up to fps, which is free for a still image.
+# prescale: scale the background once before the encode instead of per frame.
+RENDER_PROFILES = {
+    "legacy": {"fps": None, "source_fps": None, "prescale": False, "video": ["-preset", "fast", "-crf", "23"]},
+    # 24 fps keeps Instagram Reels (23-60 fps) happy; captions can change
+    # every 250 ms and there is one keyframe per 10 s.
+    "reel": {
+        "fps": 24,
+        "source_fps": 4,
+        "prescale": True,
+        "video": ["-preset", "veryfast", "-tune", "stillimage", "-crf", "23", "-g", "240",
+                  "-pix_fmt", "yuv420p", "-movflags", "+faststart"],
+    },
+    # Lowest cost for platforms that accept low frame rates.
+    "still": {
+        "fps": 6,
+        "source_fps": 6,
+        "prescale": True,
+        "video": ["-preset", "veryfast", "-tune", "stillimage", "-crf", "23", "-g", "60",
+                  "-pix_fmt", "yuv420p", "-movflags", "+faststart"],
+    },
+}
+
+# Platform presets for multi-aspect export: output size and bitrate cap
+# (the profile's CRF still applies below the cap).
+EXPORT_TARGETS = {
+    "tiktok": {"size": (720, 1280), "maxrate": "2500k"},
+    "reels": {"size": (720, 1280), "maxrate": "2500k"},
+    "twitter": {"size": (1280, 720), "maxrate": "2000k"},
+    "twitter_square": {"size": (720, 720), "maxrate": "1500k"},
+    "instagram_feed": {"size": (864, 1080), "maxrate": "2000k"},
+}
+
+_DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+# Set in each worker process by _init_worker.
+_progress_queue = None
+
+
+class RenderJob:
+    def __init__(
+        self,
+        script_text: str,
+        image_path: str,
+        output_path: str,
+        audio_path: str | None = None,
+        timeout: float = RENDER_TIMEOUT,
+        job_id: str | None = None,
+        profile: str = RENDER_PROFILE,
+        targets: list[str] | None = None,
+    ):
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile {profile}")
+        unknown = [t for t in targets or [] if t not in EXPORT_TARGETS]
+        if unknown:
+            raise ValueError(f"Unknown export targets {', '.join(unknown)}")
+        self.script_text = script_text
+        self.image_path = os.path.abspath(image_path)
+        self.output_path = os.path.abspath(output_path)
+        # None means the voiceover is generated inside the job's workspace.
+        self.audio_path = os.path.abspath(audio_path) if audio_path else None
+        self.timeout = timeout
+        self.job_id = job_id or uuid.uuid4().hex[:8]
+        self.profile = profile
+        # None renders the single 720x1280 output_path; otherwise output_path
+        # is the stem for one file per distinct target size.
+        self.targets = list(targets) if targets else None
+
+
+def _input_args(image_path: str, audio_path: str, settings: dict) -> list[str]:
+    command = [FFMPEG, "-hide_banner", "-y", "-nostats", "-progress", "pipe:1", "-loop", "1"]
+    if settings["source_fps"]:
+        command += ["-framerate", str(settings["source_fps"])]
+    return command + ["-i", image_path, "-i", audio_path]
+
+
+def _audio_args(audio_path: str) -> list[str]:
+    # The TTS voiceover is already AAC; copy it instead of re-encoding.
+    if os.path.splitext(audio_path)[1].lower() in (".aac", ".m4a"):
+        return ["-c:a", "copy"]
+    return ["-c:a", "aac", "-b:a", "128k"]
+
+
+def ffmpeg_command(
+    image_path: str, audio_path: str, srt_path: str, output_path: str, profile: str = RENDER_PROFILE
+) -> list[str]:
+    settings = RENDER_PROFILES[profile]
+    width, height = VIDEO_SIZE
+    command = _input_args(image_path, audio_path, settings)
+    video_filter = f"subtitles={srt_path}"
+    if not settings["prescale"]:
+        video_filter = f"scale={width}:{height},{video_filter}"
+    if settings["fps"] and settings["fps"] != settings["source_fps"]:
+        video_filter += f",fps={settings['fps']}"
+    command += ["-vf", video_filter, "-shortest", "-c:v", "libx264", *settings["video"]]
+    command += [*_audio_args(audio_path), output_path]
+    return command
+
+
+def export_outputs(output_path: str, targets: list[str]) -> dict[tuple, dict]:
+    """Group targets by (size, maxrate) and name one file per group."""
+    stem, ext = os.path.splitext(output_path)
+    platforms = {}
+    for target in targets:
+        spec = EXPORT_TARGETS[target]
+        platforms.setdefault((spec["size"], spec["maxrate"]), []).append(target)
+    sizes = [size for size, _ in platforms]
+    groups = {}
+    for (size, maxrate), names in platforms.items():
+        label = f"{size[0]}x{size[1]}" + (f"_{maxrate}" if sizes.count(size) > 1 else "")
+        groups[(size, maxrate)] = {"path": f"{stem}_{label}{ext or '.mp4'}", "platforms": names}
+    return groups
+
+
+def export_command(
+    image_path: str, audio_path: str, srt_path: str, outputs: list[tuple], profile: str = RENDER_PROFILE
+) -> list[str]:
+    """One ffmpeg call writing each (path, (width, height), maxrate) in outputs.
+
+    Captions are burned once on the 720x1280 canvas; each branch of the split
+    is fitted into its size with padding (so no caption is cropped) before
+    frames are duplicated up to the profile's frame rate.
+    """
+    settings = RENDER_PROFILES[profile]
+    width, height = VIDEO_SIZE
+    command = _input_args(image_path, audio_path, settings)
+    base = f"subtitles={srt_path}"
+    if not settings["prescale"]:
+        base = f"scale={width}:{height},{base}"
+    fps = f",fps={settings['fps']}" if settings["fps"] and settings["fps"] != settings["source_fps"] else ""
+    branches = "".join(f"[s{i}]" for i in range(len(outputs)))
+    graph = [f"[0:v]{base},split={len(outputs)}{branches}"]
+    for i, (_, (w, h), _) in enumerate(outputs):
+        fit = "null" if (w, h) == VIDEO_SIZE else (
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+        )
+        graph.append(f"[s{i}]{fit}{fps}[v{i}]")
+    command += ["-filter_complex", ";".join(graph)]
+    for i, (path, _, maxrate) in enumerate(outputs):
+        rate = int(maxrate.rstrip("k"))
+        command += [
+            "-map", f"[v{i}]", "-map", "1:a", "-shortest",
+            "-c:v", "libx264", *settings["video"], "-maxrate", maxrate, "-bufsize", f"{rate * 2}k",
+            *_audio_args(audio_path), path,
+        ]
+    return command
+
+
+def prescaled_background(image_path: str, workspace: str) -> str:
+    """Return a 720x1280 version of image_path for the prescale profiles.
+
+    Images in the seed catalog (or already cached from it) use the catalog's
+    background variant. Any other image is scaled once into workspace with
+    the legacy filter's geometry and never enters the catalog cache.
+    """
+    catalog = get_image_catalog()
+    directory = os.path.dirname(os.path.abspath(image_path))
+    if directory in (os.path.abspath(catalog.image_dir), os.path.abspath(catalog.cache_dir)):
+        return catalog.video_background(image_path)
+    width, height = VIDEO_SIZE
+    scaled = os.path.join(workspace, "background.jpg")
+    subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", "-y", "-i", image_path,
+         "-vf", f"scale={width}:{height}", "-frames:v", "1", "-q:v", "2", scaled],
+        check=True, capture_output=True, timeout=60,
+    )
+    return scaled
+
+
+def _report(update: dict, on_progress=None):
+    if on_progress:
+        on_progress(update)
+    if _progress_queue is not None:
+        _progress_queue.put(update)
+
+
+def run_ffmpeg(command: list[str], timeout: float, job_id: str = "", cwd: str | None = None, on_progress=None) -> dict:
+    """Run an ffmpeg command that writes ``-progress pipe:1``.
+
+    Returns a result dict with status, elapsed seconds, the last reported
+    speed and, unless it succeeded, the tail of ffmpeg's stderr.
+    """
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL, text=True
+    )
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, _kill)
+    timer.start()
+
+    stderr_tail = deque(maxlen=20)
+    duration = [0.0]
+
+    def _read_stderr():
+        for line in proc.stderr:
+            stderr_tail.append(line.rstrip())
+            match = _DURATION.search(line)
+            if match:
+                h, m, s = match.groups()
+                duration[0] = max(duration[0], int(h) * 3600 + int(m) * 60 + float(s))
+
+    reader = threading.Thread(target=_read_stderr, daemon=True)
+    reader.start()
+
+    block, speed = {}, None
+    try:
+        for line in proc.stdout:
+            key, _, value = line.strip().partition("=")
+            block[key] = value
+            if key != "progress":
+                continue
+            raw = block.get("out_time_us", "")
+            out_time = int(raw) / 1e6 if raw.lstrip("-").isdigit() else 0.0
+            speed_text = block.get("speed", "").rstrip("x").strip()
+            speed = float(speed_text) if speed_text not in ("", "N/A") else speed
+            update = {"job_id": job_id, "out_time": out_time, "speed": speed, "state": value}
+            if value == "end":
+                update["percent"] = 100.0
+            elif duration[0]:
+                update["percent"] = min(100.0, 100.0 * out_time / duration[0])
+            _report(update, on_progress)
+            block = {}
+        proc.wait()
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        reader.join(timeout=5)
+
+    result = {"job_id": job_id, "elapsed": time.monotonic() - started, "speed": speed}
+    if timed_out.is_set():
+        result.update(status="timeout", error=f"ffmpeg killed after {timeout:g}s")
+    elif proc.returncode != 0:
+        result.update(status="failed", error="\n".join(stderr_tail) or f"ffmpeg exited with {proc.returncode}")
+    else:
+        result["status"] = "ok"
+    return result
+
+
+def render_job(job: RenderJob, on_progress=None) -> dict:
+    """Render one job in a fresh temp workspace. Never raises."""
+    try:
+        with tempfile.TemporaryDirectory(prefix=f"render-{job.job_id}-", dir=RENDER_WORK_DIR) as workspace:
+            audio, segments = job.audio_path, None
+            if audio is None:
+                audio = os.path.join(workspace, "voiceover.aac")
+                segments = save_text_as_audio(job.script_text, audio)
+            save_subtitles(job.script_text, os.path.join(workspace, "captions.srt"), segments)
+            image = job.image_path
+            if RENDER_PROFILES[job.profile]["prescale"]:
+                image = prescaled_background(image, workspace)
+            # Partial files live in the workspace and are moved into place
+            # only after ffmpeg succeeded.
+            if job.targets:
+                groups = export_outputs(job.output_path, job.targets)
+                moves = {
+                    os.path.join(workspace, f"output{i}{os.path.splitext(g['path'])[1]}"): g["path"]
+                    for i, g in enumerate(groups.values())
+                }
+                outputs = [(partial, size, maxrate) for partial, (size, maxrate) in zip(moves, groups)]
+                # Run inside the workspace so the subtitles filter sees a
+                # plain relative file name.
+                command = export_command(image, audio, "captions.srt", outputs, job.profile)
+            else:
+                groups = None
+                moves = {os.path.join(workspace, "output" + os.path.splitext(job.output_path)[1]): job.output_path}
+                command = ffmpeg_command(image, audio, "captions.srt", next(iter(moves)), job.profile)
+            result = run_ffmpeg(command, job.timeout, job.job_id, cwd=workspace, on_progress=on_progress)
+            if result["status"] == "ok":
+                for partial, dest in moves.items():
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    shutil.move(partial, dest)
+                if groups:
+                    result["outputs"] = manifest(groups)
+    except Exception as exc:
+        result = {"job_id": job.job_id, "status": "failed", "error": str(exc), "elapsed": 0.0, "speed": None}
+    result["output_path"] = job.output_path
+    return result
+
+
+def manifest(groups: dict[tuple, dict]) -> dict[str, dict]:
+    """Per-platform description of the exported files."""
+    outputs = {}
+    for ((width, height), maxrate), group in groups.items():
+        entry = {
+            "path": group["path"],
+            "width": width,
+            "height": height,
+            "maxrate": maxrate,
+            "bytes": os.path.getsize(group["path"]),
+        }
+        for platform in group["platforms"]:
+            outputs[platform] = entry
+    return outputs
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+class RenderQueue:
+    """Process pool of render workers with shared progress reporting."""
+
+    def __init__(self, workers: int = RENDER_WORKERS, on_progress=None):
+        ctx = multiprocessing.get_context("spawn")
+        self._updates = ctx.Queue()
+        self.pool = ProcessPoolExecutor(
+            max_workers=max(workers, 1), mp_context=ctx, initializer=_init_worker, initargs=(self._updates,)
+        )
+        self.on_progress = on_progress
+        self.progress: dict[str, dict] = {}
+        self._drain = threading.Thread(target=self._drain_updates, daemon=True)
+        self._drain.start()
+
+    def _drain_updates(self):
+        while True:
+            update = self._updates.get()
+            if update is None:
+                return
+            self.progress[update["job_id"]] = update
+            if self.on_progress:
+                self.on_progress(update)
+
+    def submit(self, job: RenderJob) -> Future:
+        future = self.pool.submit(render_job, job)
+        future.add_done_callback(lambda f: _log_result(f, job))
+        return future
+
+    def render_all(self, jobs: list[RenderJob]) -> list[dict]:
+        """Render jobs in parallel and return their results in order."""
+        futures = [self.submit(job) for job in jobs]
+        results = []
+        for job, future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                # The worker process died (e.g. killed by the OOM killer).
+                results.append({"job_id": job.job_id, "status": "failed", "error": str(exc), "output_path": job.output_path})
+        return results
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self._updates.put(None)
+        self._drain.join(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _log_result(future: Future, job: RenderJob):
+    try:
+        result = future.result()
+    except Exception as exc:
+        print(f"❌ Render {job.job_id} crashed: {exc}")
+        return
+    if result["status"] == "ok":
+        speed = f", {result['speed']:.2f}x" if result.get("speed") else ""
+        print(f"✅ Rendered {result['output_path']} in {result['elapsed']:.1f}s{speed}")
+    else:
+        print(f"❌ Render {job.job_id} {result['status']}: {result.get('error')}")
+
+
+_default_queue: RenderQueue | None = None
+_default_lock = threading.Lock()
+
+
+def get_render_queue() -> RenderQueue:
+    """Return the process-wide render queue, creating it on first use."""
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = RenderQueue()
+        return _default_queue
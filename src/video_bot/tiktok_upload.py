@@ -0,0 +1,187 @@
+"""Resumable, chunked uploads to the TikTok Content Posting API.
+
+TikTok's ``FILE_UPLOAD`` source takes the video as ``total_chunk_count``
+PUTs of ``chunk_size`` bytes each. Chunks are 5-64 MB. A file under 5 MB
+is sent whole, and the trailing bytes ride on the last chunk, so that chunk
+can be up to 128 MB. ``plan_chunks`` picks values that follow these rules.
+The same values must go to the init call and to ``upload_chunks``.
+
+``upload_chunks`` memory-maps the MP4 and PUTs the chunks from a thread pool
+(``TIKTOK_UPLOAD_WORKERS``). Each chunk is sent straight from the mapping
+and retried on its own after network errors, 429 and 5xx responses
+(``TIKTOK_CHUNK_RETRIES``). Finished chunks are recorded in
+``<video>.upload.json`` next to the video. An interrupted upload therefore
+resumes with the same ``upload_url`` and only sends the missing chunks. The
+record is discarded once the video changes or the upload URL expires
+(``TIKTOK_UPLOAD_URL_TTL``).
+"""
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+TIKTOK_MIN_CHUNK = 5 * 1024 * 1024
+TIKTOK_MAX_CHUNK = 64 * 1024 * 1024
+TIKTOK_CHUNK_SIZE = int(os.getenv("TIKTOK_CHUNK_SIZE", str(10 * 1024 * 1024)))
+TIKTOK_UPLOAD_WORKERS = int(os.getenv("TIKTOK_UPLOAD_WORKERS", "4"))
+TIKTOK_CHUNK_RETRIES = int(os.getenv("TIKTOK_CHUNK_RETRIES", "3"))
+TIKTOK_CHUNK_TIMEOUT = float(os.getenv("TIKTOK_CHUNK_TIMEOUT", "120"))
+TIKTOK_RETRY_BACKOFF = float(os.getenv("TIKTOK_RETRY_BACKOFF", "1"))
+# upload_url is valid for an hour after the init call; keep a margin.
+TIKTOK_UPLOAD_URL_TTL = int(os.getenv("TIKTOK_UPLOAD_URL_TTL", "3300"))
+
+
+class ChunkError(Exception):
+    def __init__(self, index: int, message: str, retryable: bool):
+        super().__init__(f"chunk {index}: {message}")
+        self.index = index
+        self.retryable = retryable
+
+
+def plan_chunks(video_size: int, chunk_size: int = TIKTOK_CHUNK_SIZE) -> tuple[int, int]:
+    """Return a spec-compliant ``(chunk_size, total_chunk_count)`` for a video."""
+    if video_size <= 0:
+        raise ValueError("Video is empty")
+    chunk_size = min(max(chunk_size, TIKTOK_MIN_CHUNK), TIKTOK_MAX_CHUNK)
+    if video_size < TIKTOK_MIN_CHUNK or video_size <= chunk_size:
+        return video_size, 1
+    return chunk_size, video_size // chunk_size
+
+
+def chunk_ranges(video_size: int, chunk_size: int, total_chunk_count: int) -> list[tuple[int, int]]:
+    """Inclusive ``(first, last)`` byte ranges; the last chunk takes the remainder."""
+    ranges = [(i * chunk_size, (i + 1) * chunk_size - 1) for i in range(total_chunk_count)]
+    ranges[-1] = (ranges[-1][0], video_size - 1)
+    return ranges
+
+
+def record_path(video_path: str) -> str:
+    return f"{video_path}.upload.json"
+
+
+def _save_record(record: dict):
+    path = record_path(record["video_path"])
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+
+
+def new_upload_record(video_path: str, upload_url: str, publish_id: str, chunk_size: int, total_chunk_count: int) -> dict:
+    """Start tracking an upload that was just initialised with TikTok."""
+    stat = os.stat(video_path)
+    record = {
+        "video_path": video_path,
+        "video_size": stat.st_size,
+        "video_mtime": stat.st_mtime_ns,
+        "upload_url": upload_url,
+        "publish_id": publish_id,
+        "chunk_size": chunk_size,
+        "total_chunk_count": total_chunk_count,
+        "created": time.time(),
+        "done": [],
+    }
+    _save_record(record)
+    return record
+
+
+def load_upload_record(video_path: str) -> dict | None:
+    """Return the unfinished upload of video_path, or None if there is none to resume."""
+    path = record_path(video_path)
+    try:
+        with open(path) as f:
+            record = json.load(f)
+        stat = os.stat(video_path)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if (
+        record.get("video_size") != stat.st_size
+        or record.get("video_mtime") != stat.st_mtime_ns
+        or time.time() - record.get("created", 0) > TIKTOK_UPLOAD_URL_TTL
+    ):
+        os.remove(path)
+        return None
+    return record
+
+
+def _put_chunk(session, url: str, mm: mmap.mmap, index: int, first: int, last: int, size: int, retries: int, backoff: float):
+    headers = {
+        "Content-Type": "video/mp4",
+        "Content-Length": str(last - first + 1),
+        "Content-Range": f"bytes {first}-{last}/{size}",
+    }
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        # A view into the mapping: the chunk is sent without being copied.
+        with memoryview(mm)[first:last + 1] as body:
+            try:
+                resp = session.put(url, headers=headers, data=body, timeout=TIKTOK_CHUNK_TIMEOUT)
+            except Exception as exc:
+                error = ChunkError(index, str(exc), True)
+                continue
+        if resp.status_code < 300:
+            return
+        retryable = resp.status_code == 429 or resp.status_code >= 500
+        error = ChunkError(index, f"HTTP {resp.status_code} {resp.text[:200]}", retryable)
+        if not retryable:
+            break
+    raise error
+
+
+def upload_chunks(
+    record: dict,
+    workers: int = TIKTOK_UPLOAD_WORKERS,
+    retries: int = TIKTOK_CHUNK_RETRIES,
+    backoff: float = TIKTOK_RETRY_BACKOFF,
+    session=None,
+) -> dict:
+    """PUT the chunks of record's video that are not uploaded yet.
+
+    Progress is saved after every chunk. Raises ``RuntimeError`` naming the
+    failed chunks once their retries are used up; calling again with
+    ``load_upload_record`` resumes from there. The record file is removed
+    after the last chunk is accepted.
+    """
+    import requests
+
+    video_path = record["video_path"]
+    size = record["video_size"]
+    ranges = chunk_ranges(size, record["chunk_size"], record["total_chunk_count"])
+    done = set(record["done"])
+    pending = [i for i in range(len(ranges)) if i not in done]
+    if pending:
+        print(f"⬆️ Uploading {len(pending)}/{len(ranges)} chunks of {video_path}")
+    workers = max(1, min(workers, len(pending) or 1))
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    failed = {}
+    with open(video_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_put_chunk, session, record["upload_url"], mm, i, *ranges[i], size, retries, backoff): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    future.result()
+                except ChunkError as exc:
+                    failed[index] = str(exc)
+                    continue
+                record["done"] = sorted(set(record["done"]) | {index})
+                _save_record(record)
+    if failed:
+        raise RuntimeError(
+            f"TikTok upload incomplete ({len(record['done'])}/{len(ranges)} chunks): " + "; ".join(failed[i] for i in sorted(failed))
+        )
+    try:
+        os.remove(record_path(video_path))
+    except FileNotFoundError:
+        pass
+    print(f"✅ Uploaded {video_path} in {len(ranges)} chunks")
+    return record
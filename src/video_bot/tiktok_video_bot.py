@@ -3,9 +3,12 @@ import sys
 import requests
 
 sys.path.append(os.path.dirname(__file__))
-from generate_video import generate_script, save_text_as_audio, generate_video
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from generate_video import generate_script, get_random_background
 
 TIKTOK_ACCESS_TOKEN = os.getenv("TIKTOK_ACCESS_TOKEN")
+# Reels rendered in parallel when run as a script.
+TIKTOK_BATCH = int(os.getenv("TIKTOK_BATCH", "1"))
 
 
 def query_creator_info(token: str):
@@ -19,7 +22,7 @@ def query_creator_info(token: str):
     return resp.json()
 
 
-def init_video_upload(token: str, title: str, video_size: int):
+def init_video_upload(token: str, title: str, video_size: int, chunk_size: int | None = None, total_chunk_count: int = 1):
     url = "https://open.tiktokapis.com/v2/post/publish/video/init/"
     headers = {
         "Authorization": f"Bearer {token}",
@@ -37,8 +40,8 @@ def init_video_upload(token: str, title: str, video_size: int):
         "source_info": {
             "source": "FILE_UPLOAD",
             "video_size": video_size,
-            "chunk_size": video_size,
-            "total_chunk_count": 1,
+            "chunk_size": chunk_size or video_size,
+            "total_chunk_count": total_chunk_count,
         },
     }
     resp = requests.post(url, headers=headers, json=data)
@@ -46,15 +49,30 @@ def init_video_upload(token: str, title: str, video_size: int):
     return resp.json()
 
 
-def upload_video_file(upload_url: str, video_path: str):
-    size = os.path.getsize(video_path)
-    headers = {
-        "Content-Range": f"bytes 0-{size-1}/{size}",
-        "Content-Type": "video/mp4",
-    }
-    with open(video_path, "rb") as f:
-        resp = requests.put(upload_url, headers=headers, data=f)
-    resp.raise_for_status()
+def upload_video_file(token: str, title: str, video_path: str) -> str:
+    """Upload video_path in parallel chunks and return its publish_id.
+
+    An upload interrupted within the hour resumes where it stopped instead
+    of initialising a new post (see ``tiktok_upload.py``).
+    """
+    from src.video_bot.tiktok_upload import load_upload_record, new_upload_record, plan_chunks, upload_chunks
+
+    record = load_upload_record(video_path)
+    if record is None:
+        size = os.path.getsize(video_path)
+        chunk_size, total_chunk_count = plan_chunks(size)
+        init_resp = init_video_upload(token, title, size, chunk_size, total_chunk_count)
+        record = new_upload_record(
+            video_path,
+            init_resp["data"]["upload_url"],
+            init_resp["data"]["publish_id"],
+            chunk_size,
+            total_chunk_count,
+        )
+    else:
+        print(f"🔁 Resuming TikTok upload {record['publish_id']} ({len(record['done'])}/{record['total_chunk_count']} chunks)")
+    upload_chunks(record)
+    return record["publish_id"]
 
 
 def check_status(token: str, publish_id: str):
@@ -75,18 +93,27 @@ def post_video_to_tiktok(video_path: str, title: str):
         return
 
     query_creator_info(token)
-    size = os.path.getsize(video_path)
-    init_resp = init_video_upload(token, title, size)
-    upload_url = init_resp["data"]["upload_url"]
-    publish_id = init_resp["data"]["publish_id"]
-    upload_video_file(upload_url, video_path)
+    publish_id = upload_video_file(token, title, video_path)
     status = check_status(token, publish_id)
     print("TikTok upload status:", status)
 
 
+def render_reels(scripts: list[str], queue=None) -> list[dict]:
+    """Render one reel per script in parallel; returns the render results in order."""
+    from src.video_bot.render_queue import RenderJob, RenderQueue
+
+    outputs = ["output_reel.mp4"] if len(scripts) == 1 else [f"output_reel_{i + 1}.mp4" for i in range(len(scripts))]
+    jobs = [RenderJob(script, get_random_background(), path) for script, path in zip(scripts, outputs)]
+    if queue is not None:
+        return queue.render_all(jobs)
+    with RenderQueue() as own_queue:
+        return own_queue.render_all(jobs)
+
+
 if __name__ == "__main__":
     print("Generating video for TikTok...")
-    script_text = generate_script()
-    save_text_as_audio(script_text)
-    generate_video(script_text)
-    # post_video_to_tiktok("output_reel.mp4", script_text)
+    scripts = [generate_script() for _ in range(max(TIKTOK_BATCH, 1))]
+    for script_text, result in zip(scripts, render_reels(scripts)):
+        if result["status"] == "ok":
+            print("Rendered", result["output_path"])
+            # post_video_to_tiktok(result["output_path"], script_text)
@@ -0,0 +1,137 @@
+"""Sentence-level, cached text-to-speech for the video bot.
+
+``synthesize`` splits a script into sentences and fetches the sentences that
+are not cached yet from gTTS in parallel (``TTS_WORKERS``), so a voiceover
+takes about as long as its longest sentence. Each sentence is stored in
+``TTS_CACHE_DIR`` as raw 16-bit mono PCM, keyed by a hash of language, text
+and sample rate, which means recurring lines such as a call to action are
+synthesized once. The least recently used files are evicted when the cache
+grows past ``TTS_CACHE_MAX_BYTES``.
+
+The voiceover is the plain concatenation of the cached PCM, encoded to ADTS
+AAC (``TTS_BITRATE``) in one pass. One encode means one run of encoder
+priming at the start instead of a gap at every sentence join, and ffmpeg can
+stream-copy the track into the video. Durations are exact sample counts.
+"""
+import hashlib
+import io
+import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+TTS_LANG = os.getenv("TTS_LANG", "en")
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "tts-cache")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+# gTTS returns 24 kHz mono MP3; keep that rate so every sentence concatenates.
+TTS_SAMPLE_RATE = 24000
+TTS_BITRATE = os.getenv("TTS_BITRATE", "64k")
+FFMPEG = os.getenv("FFMPEG", "ffmpeg")
+
+# Sentence punctuation only ends a sentence before whitespace or the end of
+# the text, so "v2.5" and "example.com" stay in one piece.
+_SENTENCE = re.compile(r"\S.*?(?:[.!?]+(?=\s|$)|\n|$)", re.S)
+_BYTES_PER_SECOND = TTS_SAMPLE_RATE * 2
+_CACHE_FILE = re.compile(r"[0-9a-f]{64}\.pcm")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split text into sentences, keeping their closing punctuation."""
+    sentences = [s.strip() for s in _SENTENCE.findall(text)]
+    return [s for s in sentences if any(ch.isalnum() for ch in s)] or [text.strip()]
+
+
+def _cache_path(sentence: str, lang: str) -> str:
+    key = hashlib.sha256(f"{lang}\0{TTS_SAMPLE_RATE}\0{sentence}".encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}.pcm")
+
+
+def _synthesize_mp3(sentence: str, lang: str) -> bytes:
+    from gtts import gTTS
+
+    buf = io.BytesIO()
+    gTTS(sentence, lang=lang).write_to_fp(buf)
+    return buf.getvalue()
+
+
+def _ffmpeg(args: list[str], data: bytes, what: str) -> bytes:
+    proc = subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", *args],
+        input=data, capture_output=True, timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{what} failed: {proc.stderr.decode(errors='replace')[-500:]}")
+    return proc.stdout
+
+
+def _to_pcm(mp3: bytes) -> bytes:
+    return _ffmpeg(
+        ["-f", "mp3", "-i", "pipe:0", "-ac", "1", "-ar", str(TTS_SAMPLE_RATE), "-f", "s16le", "pipe:1"],
+        mp3, "MP3 decode",
+    )
+
+
+def _to_aac(pcm: bytes, bitrate: str = TTS_BITRATE) -> bytes:
+    return _ffmpeg(
+        ["-f", "s16le", "-ac", "1", "-ar", str(TTS_SAMPLE_RATE), "-i", "pipe:0",
+         "-c:a", "aac", "-b:a", bitrate, "-f", "adts", "pipe:1"],
+        pcm, "AAC encode",
+    )
+
+
+def _sentence_audio(sentence: str, lang: str) -> tuple[bytes, bool]:
+    """Return (PCM bytes, was_cached) for one sentence."""
+    path = _cache_path(sentence, lang)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # mark as recently used for eviction
+        return data, True
+    except FileNotFoundError:
+        pass
+    data = _to_pcm(_synthesize_mp3(sentence, lang))
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{id(data)}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return data, False
+
+
+def evict(max_bytes: int = TTS_CACHE_MAX_BYTES):
+    """Delete least recently used cache files until the cache fits max_bytes."""
+    try:
+        entries = [e for e in os.scandir(TTS_CACHE_DIR) if _CACHE_FILE.fullmatch(e.name)]
+    except FileNotFoundError:
+        return
+    files = sorted((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries)
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def synthesize(text: str, audio_path: str, lang: str = TTS_LANG, workers: int = TTS_WORKERS) -> list[tuple[str, float]]:
+    """Write the voiceover for text to audio_path (ADTS AAC).
+
+    Returns ``(sentence, seconds)`` for every sentence in order, which is
+    enough to time captions to the voice.
+    """
+    sentences = split_sentences(text)
+    unique = list(dict.fromkeys(sentences))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique)))) as pool:
+        audio = dict(zip(unique, pool.map(lambda s: _sentence_audio(s, lang), unique)))
+    with open(audio_path, "wb") as f:
+        f.write(_to_aac(b"".join(audio[sentence][0] for sentence in sentences)))
+    fresh = sum(1 for data, cached in audio.values() if not cached)
+    if fresh:
+        evict()
+    print(f"🔊 Voiceover: {len(sentences)} sentences, {fresh} synthesized, {len(unique) - fresh} cached")
+    return [(sentence, len(audio[sentence][0]) / _BYTES_PER_SECOND) for sentence in sentences]
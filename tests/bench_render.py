@@ -0,0 +1,85 @@
+"""Benchmark the reel render profiles on a synthetic still image + voiceover.
+
+Renders the same 1080x1920 photo-like background, captions and audio with
+every profile in ``RENDER_PROFILES`` and reports encode time, speed and
+output size against ``legacy`` (the original full-rate command). The
+pre-scaled background is built once before timing and its cost is reported
+separately.
+
+Usage:
+    python tests/bench_render.py [seconds] [runs]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.video_bot.generate_video import save_subtitles
+from src.video_bot.render_queue import (
+    FFMPEG,
+    RENDER_PROFILES,
+    ffmpeg_command,
+    prescaled_background,
+    run_ffmpeg,
+)
+
+SCRIPT = (
+    "Snap a photo of your fridge. Get three dinner ideas in seconds. "
+    "No more wasted groceries. Try RecipeSnap free today"
+)
+
+
+def make_inputs(workspace: str, seconds: float) -> tuple[str, str]:
+    image = os.path.join(workspace, "background.jpg")
+    audio = os.path.join(workspace, "voiceover.mp3")
+    # Noise over a gradient compresses like a photo rather than a flat colour.
+    subprocess.run(
+        [FFMPEG, "-v", "error", "-y", "-f", "lavfi", "-i", "gradients=s=1080x1920",
+         "-vf", "noise=alls=30:allf=u", "-frames:v", "1", "-q:v", "3", image],
+        check=True,
+    )
+    subprocess.run(
+        [FFMPEG, "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}", audio],
+        check=True,
+    )
+    return image, audio
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 15
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory(prefix="bench-render-") as workspace:
+        image, audio = make_inputs(workspace, seconds)
+        save_subtitles(SCRIPT, os.path.join(workspace, "captions.srt"))
+        start = time.perf_counter()
+        scaled = prescaled_background(image, workspace)
+        prescale = time.perf_counter() - start
+
+        rows = {}
+        for profile, settings in RENDER_PROFILES.items():
+            source = scaled if settings["prescale"] else image
+            output = os.path.join(workspace, f"{profile}.mp4")
+            times = []
+            for _ in range(runs):
+                command = ffmpeg_command(source, audio, "captions.srt", output, profile)
+                result = run_ffmpeg(command, timeout=600, job_id=profile, cwd=workspace)
+                if result["status"] != "ok":
+                    raise SystemExit(f"{profile} failed: {result.get('error')}")
+                times.append(result["elapsed"])
+            rows[profile] = (min(times), os.path.getsize(output))
+
+    base_time, base_size = rows["legacy"]
+    print(f"{seconds:g}s reel, best of {runs}; prescale (once per render): {prescale * 1000:.0f} ms")
+    print(f"{'profile':8} {'encode':>9} {'speed':>8} {'size':>10} {'vs legacy':>18}")
+    for profile, (elapsed, size) in rows.items():
+        print(
+            f"{profile:8} {elapsed:8.2f}s {seconds / elapsed:7.1f}x {size / 1024:8.0f} KB"
+            f"   {base_time / elapsed:5.1f}x faster, {100 * size / base_size:4.0f}% size"
+        )
+
+
+if __name__ == "__main__":
+    main()
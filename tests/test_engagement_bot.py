@@ -0,0 +1,62 @@
+"""Follow-back handling in engagement_bot.unfollow_nonfollowers.
+
+The ledger and follower snapshot live in a temp directory; the follower list
+and the unfollow call are replaced with in-memory stand-ins.
+
+Run with pytest, or directly:
+    python tests/test_engagement_bot.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+pytest.importorskip("tweepy")
+pytest.importorskip("numpy")
+from src import engagement_bot
+from src.follow_ledger import FollowLedger
+from src.follower_set import FollowerSet
+
+
+class _API:
+    def __init__(self):
+        self.unfollowed = []
+
+    def destroy_friendship(self, user_id):
+        self.unfollowed.append(user_id)
+
+
+def _run(monkeypatch, api, followers):
+    monkeypatch.setattr(engagement_bot, "get_api", lambda: api)
+    monkeypatch.setattr(FollowerSet, "fetch", classmethod(lambda cls, api, user_id=None: cls.from_ids(followers)))
+    engagement_bot.unfollow_nonfollowers()
+
+
+def test_follow_back_that_unfollows_is_unfollowed(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    ledger = FollowLedger()
+    old = datetime.utcnow() - timedelta(days=engagement_bot.UNFOLLOW_AFTER_DAYS + 1)
+    for uid in ("1", "2"):
+        ledger.record(uid, old)
+    ledger.close()
+    api = _API()
+
+    # Both follow back: they are marked mutual and kept.
+    _run(monkeypatch, api, [1, 2])
+    assert api.unfollowed == []
+    ledger = FollowLedger()
+    assert list(ledger.expired(datetime.utcnow())) == []
+    ledger.close()
+
+    # 1 stops following back: the mark is cleared and 1 is unfollowed.
+    _run(monkeypatch, api, [2])
+    assert api.unfollowed == ["1"]
+    ledger = FollowLedger()
+    assert "1" not in ledger and "2" in ledger
+    ledger.close()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,83 @@
+"""Import-time budget for the bot entry points.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``
+and no API credentials in the environment. The import must succeed, stay
+under ``IMPORT_BUDGET_MS`` and must not pull in the heavy client libraries
+(openai, tweepy, PIL, gTTS, apscheduler), which are only loaded on first use.
+
+Run with pytest, or directly for a timing table:
+    python tests/test_import_time.py
+"""
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "250"))
+
+MODULES = [
+    "src.post_scheduler",
+    "src.daemon",
+    "src.content_queue",
+    "src.engagement_bot",
+    "src.meme_generator",
+    "src.twitter_bot.daily_tweet",
+    "src.twitter_bot.daily_text_tweet",
+    "src.twitter_bot.reply_mentions",
+    "src.facebook_bot.daily_facebook_post",
+    "src.instagram_bot.instagram_replies",
+    "src.video_bot.generate_video",
+]
+HEAVY = ["openai", "tweepy", "PIL", "gtts", "apscheduler"]
+
+_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)")
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """Return (cumulative import ms, heavy packages loaded) for module."""
+    env = {"PATH": os.environ.get("PATH", ""), "PYTHONPATH": ROOT}
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    total = 0
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match and match.group(2) == module:
+            total = int(match.group(1))
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total / 1000, loaded
+
+
+def test_import_budget():
+    failures = []
+    for module in MODULES:
+        ms, loaded = measure(module)
+        if ms > IMPORT_BUDGET_MS:
+            failures.append(f"{module}: {ms:.1f} ms > {IMPORT_BUDGET_MS:.0f} ms")
+        if loaded:
+            failures.append(f"{module}: imports {', '.join(loaded)} at load time")
+    assert not failures, "\n".join(failures)
+
+
+def main():
+    print(f"⏱️ Import budget: {IMPORT_BUDGET_MS:.0f} ms")
+    ok = True
+    for module in MODULES:
+        ms, loaded = measure(module)
+        status = "✅" if ms <= IMPORT_BUDGET_MS and not loaded else "❌"
+        ok = ok and status == "✅"
+        extra = f" (loads {', '.join(loaded)})" if loaded else ""
+        print(f"{status} {module:40} {ms:8.1f} ms{extra}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Per-platform deadlines in post_scheduler.post_to_all_platforms.
+
+The worker processes are spawned for real; a deadline shorter than a worker's
+start-up guarantees it is killed before it can post anything.
+
+Run with pytest, or directly:
+    python tests/test_post_scheduler.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src import post_scheduler
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_timeouts_apply_in_serial_and_parallel_mode(monkeypatch, tmp_path, workers):
+    monkeypatch.setattr(post_scheduler, "LOG_FILE", str(tmp_path / "log.txt"))
+    monkeypatch.setattr(post_scheduler, "ERROR_EMAIL", None)
+    results = post_scheduler.post_to_all_platforms(
+        workers=workers, timeouts={"twitter": 0.01, "instagram": 0.01}
+    )
+    assert results == {"twitter": "timeout", "instagram": "timeout"}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
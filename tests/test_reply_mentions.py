@@ -0,0 +1,91 @@
+"""Checkpointing in reply_mentions.reply_to_mentions when replies fail.
+
+A fake API serves one page of mentions; reply generation and posting are
+swapped for functions that fail, and the test checks that the saved window
+and since_id never move past a mention that was not answered.
+
+Run with pytest, or directly:
+    python tests/test_reply_mentions.py
+"""
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+tweepy = pytest.importorskip("tweepy")
+from src.twitter_bot import reply_mentions
+
+
+class _API:
+    def __init__(self, mentions, fail_with=None):
+        self.mentions = mentions
+        self.fail_with = fail_with
+        self.posted = []
+
+    def verify_credentials(self):
+        return SimpleNamespace(screen_name="brand")
+
+    def mentions_timeline(self, since_id, max_id=None, count=200, **kwargs):
+        return [m for m in self.mentions if m.id > since_id and (max_id is None or m.id <= max_id)][:count]
+
+    def update_status(self, status, in_reply_to_status_id):
+        if self.fail_with:
+            raise self.fail_with
+        self.posted.append(in_reply_to_status_id)
+
+
+def _mention(mention_id: int, text: str):
+    return SimpleNamespace(id=mention_id, full_text=text, user=SimpleNamespace(screen_name=f"user{mention_id}"))
+
+
+MENTIONS = [
+    _mention(200, "How do I reset my password on the mobile app?"),
+    _mention(150, "Which plans include priority support for teams?"),
+]
+
+
+def _run(monkeypatch, workdir, api, generate):
+    monkeypatch.setattr(reply_mentions, "SINCE_ID_FILE", os.path.join(workdir, "since_id.txt"))
+    monkeypatch.setattr(reply_mentions, "MENTION_WINDOW_FILE", os.path.join(workdir, "mention_window.json"))
+    monkeypatch.setattr(reply_mentions, "REPLY_INTERVAL", 0)
+    monkeypatch.setattr(reply_mentions, "get_api", lambda: api)
+    monkeypatch.setattr(reply_mentions, "generate_reply", generate)
+    reply_mentions.save_since_id(100)
+    reply_mentions.reply_to_mentions()
+
+
+def _saved_state():
+    window = reply_mentions.load_window()
+    return reply_mentions.load_since_id(), window and window["max_id"]
+
+
+def _failing_generate(text):
+    raise RuntimeError("model unavailable")
+
+
+def test_failed_generation_keeps_window(monkeypatch):
+    with tempfile.TemporaryDirectory() as workdir:
+        api = _API(MENTIONS)
+        _run(monkeypatch, workdir, api, _failing_generate)
+        assert api.posted == []
+        assert _saved_state() == (100, None)
+
+
+def test_rate_limited_reply_keeps_window(monkeypatch):
+    with tempfile.TemporaryDirectory() as workdir:
+        api = _API(MENTIONS, fail_with=tweepy.TweepyException("Rate limit for update_status resets in 900s"))
+        _run(monkeypatch, workdir, api, lambda text: "See the FAQ.")
+        assert _saved_state() == (100, None)
+
+        # The next run answers the same mentions and only then moves since_id.
+        api.fail_with = None
+        reply_mentions.reply_to_mentions()
+        assert api.posted == [200, 150]
+        assert _saved_state() == (200, None)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,37 @@
+"""Day-0 slots from slot_planner.plan_slots on days with a DST change.
+
+Run with pytest, or directly:
+    python tests/test_slot_planner.py
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+np = pytest.importorskip("numpy")
+from src.slot_planner import plan_slots, slot_datetime
+
+ACCOUNT = {"platform": "twitter", "tz": "America/New_York", "start_hour": 0, "end_hour": 24,
+           "quiet_hours": [], "daily_cap": 3, "min_gap": 1}
+
+
+@pytest.mark.parametrize(
+    "now",
+    [
+        # 2026-03-08 22:30 EDT, the day clocks spring forward.
+        datetime(2026, 3, 9, 2, 30, tzinfo=timezone.utc),
+        # 2026-11-01 01:30 EST, inside the hour repeated when clocks fall back.
+        datetime(2026, 11, 1, 6, 30, tzinfo=timezone.utc),
+    ],
+)
+def test_dst_day_slots_are_in_the_future(now):
+    for seed in range(50):
+        plan = plan_slots([ACCOUNT], days=1, now=now, rng=np.random.default_rng(seed))
+        assert len(plan)
+        assert all(slot_datetime(when) > now for when in plan["when"])
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
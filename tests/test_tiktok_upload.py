@@ -0,0 +1,160 @@
+"""Chunked TikTok upload against a local stand-in for the upload endpoint.
+
+``StandIn`` is an HTTP server that accepts ``PUT`` chunks the way TikTok's
+``upload_url`` does: it checks ``Content-Range`` against the body and replies
+206 until every byte has arrived, then 201. It can be told to fail a chunk
+a number of times to exercise retries and resume.
+
+Run with pytest, or directly:
+    python tests/test_tiktok_upload.py
+"""
+import os
+import re
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.video_bot.tiktok_upload import (
+    TIKTOK_MAX_CHUNK,
+    TIKTOK_MIN_CHUNK,
+    chunk_ranges,
+    load_upload_record,
+    new_upload_record,
+    plan_chunks,
+    record_path,
+    upload_chunks,
+)
+
+MB = 1024 * 1024
+_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_PUT(self):
+        server = self.server
+        match = _RANGE.fullmatch(self.headers.get("Content-Range", ""))
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not match or self.headers.get("Content-Type") != "video/mp4":
+            return self._reply(400)
+        first, last, total = map(int, match.groups())
+        if len(body) != last - first + 1 or last >= total:
+            return self._reply(416)
+        with server.lock:
+            server.requests.append(first)
+            if server.failures.get(first, 0) > 0:
+                server.failures[first] -= 1
+                return self._reply(503)
+            server.chunks[first] = body
+            complete = sum(len(chunk) for chunk in server.chunks.values()) == total
+        self._reply(201 if complete else 206)
+
+    def _reply(self, status: int):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class StandIn(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.chunks = {}
+        self.requests = []
+        self.failures = {}
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/upload/?upload_id=1"
+
+    def received(self) -> bytes:
+        return b"".join(self.chunks[first] for first in sorted(self.chunks))
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        super().__exit__(*exc)
+
+
+def _video(workspace: str, size: int) -> tuple[str, bytes]:
+    path = os.path.join(workspace, "reel.mp4")
+    data = os.urandom(size)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path, data
+
+
+def test_plan_chunks():
+    assert plan_chunks(3 * MB) == (3 * MB, 1)
+    assert plan_chunks(40 * MB, 64 * MB) == (40 * MB, 1)
+    assert plan_chunks(12 * MB, 5 * MB) == (5 * MB, 2)
+    assert plan_chunks(12 * MB, 1 * MB) == (5 * MB, 2)
+    for size in (5 * MB, 64 * MB + 1, 127 * MB, 1000 * MB + 17):
+        chunk_size, count = plan_chunks(size, 200 * MB)
+        ranges = chunk_ranges(size, chunk_size, count)
+        assert TIKTOK_MIN_CHUNK <= chunk_size <= TIKTOK_MAX_CHUNK
+        assert ranges[0][0] == 0 and ranges[-1][1] == size - 1
+        assert all(last - first + 1 == chunk_size for first, last in ranges[:-1])
+        assert chunk_size <= ranges[-1][1] - ranges[-1][0] + 1 <= 2 * TIKTOK_MAX_CHUNK
+
+
+def test_parallel_upload_with_retry():
+    with tempfile.TemporaryDirectory() as workspace, StandIn() as server:
+        path, data = _video(workspace, 16 * MB + 123)
+        chunk_size, count = plan_chunks(len(data), 5 * MB)
+        server.failures = {5 * MB: 2}
+        record = new_upload_record(path, server.url, "p1", chunk_size, count)
+        upload_chunks(record, workers=3, retries=2, backoff=0)
+
+        assert server.received() == data
+        assert sorted(server.requests) == [0, 5 * MB, 5 * MB, 5 * MB, 10 * MB]
+        assert not os.path.exists(record_path(path))
+
+
+def test_resume_after_interruption():
+    with tempfile.TemporaryDirectory() as workspace, StandIn() as server:
+        path, data = _video(workspace, 16 * MB)
+        chunk_size, count = plan_chunks(len(data), 5 * MB)
+        server.failures = {5 * MB: 10}
+        new_upload_record(path, server.url, "p2", chunk_size, count)
+        try:
+            upload_chunks(load_upload_record(path), workers=2, retries=1, backoff=0)
+        except RuntimeError as exc:
+            assert "chunk 1" in str(exc)
+        else:
+            raise AssertionError("upload should have stopped at chunk 1")
+
+        record = load_upload_record(path)
+        assert record["publish_id"] == "p2" and record["done"] == [0, 2]
+        server.failures.clear()
+        server.requests.clear()
+        upload_chunks(record, backoff=0)
+
+        assert server.requests == [5 * MB]
+        assert server.received() == data
+        assert load_upload_record(path) is None
+
+
+def test_changed_video_is_not_resumed():
+    with tempfile.TemporaryDirectory() as workspace:
+        path, data = _video(workspace, 6 * MB)
+        new_upload_record(path, "http://127.0.0.1:9/upload/", "p3", *plan_chunks(len(data)))
+        with open(path, "ab") as f:
+            f.write(b"\0")
+        assert load_upload_record(path) is None
+        assert not os.path.exists(record_path(path))
+
+
+def main():
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
+
+
+if __name__ == "__main__":
+    main()
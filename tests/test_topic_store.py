@@ -0,0 +1,47 @@
+"""No-repeat history of topic_store.TopicStore shared between processes.
+
+Two stores on the same file stand in for the parallel posting workers of
+post_scheduler, each of which builds its own store.
+
+Run with pytest, or directly:
+    python tests/test_topic_store.py
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.topic_store import TopicStore
+
+
+def _topic_file(workdir: str, topics: list[str]) -> str:
+    path = os.path.join(workdir, "topics.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(topics))
+    return path
+
+
+def test_parallel_stores_keep_each_others_records():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = _topic_file(workdir, ["a", "b", "c"])
+        first, second = TopicStore(path), TopicStore(path)
+        first.record("a")
+        second.record("b")
+        assert TopicStore(path).recent() == ["a", "b"]
+        # A pick in either store avoids the other's record.
+        for _ in range(20):
+            assert first.sample("default", record=False) == "c"
+
+
+def test_history_keeps_only_the_latest_topics():
+    with tempfile.TemporaryDirectory() as workdir:
+        store = TopicStore(_topic_file(workdir, ["a"]), history_size=2)
+        for topic in ["a", "b", "c"]:
+            store.record(topic)
+        assert store.recent() == ["b", "c"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))